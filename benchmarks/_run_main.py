@@ -0,0 +1,26 @@
+"""
+Run src/main.py with benchmarks/bench_harvest_config.py as its config, whatever
+src/config/harvest_config.py contains. Used by bench_end_to_end.py.
+
+    python benchmarks/_run_main.py --show --start=02/06/2025 --end=06/06/2025
+"""
+import importlib.util
+import os
+import runpy
+import sys
+
+import _bench_path
+
+MAIN = os.path.join(_bench_path.SRC_DIR, "main.py")
+CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_harvest_config.py")
+
+if __name__ == "__main__":
+    spec = importlib.util.spec_from_file_location("config.harvest_config", CONFIG)
+    harvest_config = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(harvest_config)
+    import config
+    sys.modules["config.harvest_config"] = harvest_config
+    config.harvest_config = harvest_config
+
+    sys.argv = [MAIN, *sys.argv[1:]]
+    runpy.run_path(MAIN, run_name="__main__")
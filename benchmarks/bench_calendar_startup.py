@@ -0,0 +1,113 @@
+"""
+Benchmark GoogleCalendarSDK construction against a local fake of Google's OAuth token endpoint.
+
+Compares the previous start-up path (refresh check, rewrite token.json and build() from the
+full discovery document on every run) with the lazy SDK using the cached, trimmed discovery
+document and only writing credentials when they change.
+
+    python benchmarks/bench_calendar_startup.py --runs 20
+"""
+import argparse
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import _bench_path  # noqa: F401
+
+import google.oauth2.credentials
+from google.auth.transport.requests import Request
+from google.oauth2.credentials import Credentials
+from googleapiclient.discovery import build
+
+from google_calendar.google_calendar_sdk import GoogleCalendarSDK, SCOPES
+
+
+class FakeTokenHandler(BaseHTTPRequestHandler):
+    """Answers OAuth refresh requests like https://oauth2.googleapis.com/token"""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        body = json.dumps({"access_token": "fake-access-token", "expires_in": 3600, "token_type": "Bearer"}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def write_token(path, token_uri, expired):
+    expiry = datetime.now(timezone.utc) + timedelta(hours=-1 if expired else 1)
+    with open(path, "w") as f:
+        json.dump({
+            "token": "fake-access-token",
+            "refresh_token": "fake-refresh-token",
+            "token_uri": token_uri,
+            "client_id": "fake-client",
+            "client_secret": "fake-secret",
+            "scopes": SCOPES,
+            "expiry": expiry.replace(tzinfo=None).isoformat() + "Z",
+        }, f)
+
+
+def legacy_start(token_file):
+    creds = Credentials.from_authorized_user_file(token_file, SCOPES)
+    if not creds.valid:
+        creds.refresh(Request())
+    with open(token_file, "w") as token:
+        token.write(creds.to_json())
+    return build("calendar", "v3", credentials=creds)
+
+
+def new_start(token_file):
+    GoogleCalendarSDK._services.clear()  # behave like a fresh process
+    return GoogleCalendarSDK(token_file=token_file).service
+
+
+def timed(label, func, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        func()
+    print(f"{label:<40}{(time.perf_counter() - start) / runs * 1000:>10.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="GoogleCalendarSDK start-up benchmark")
+    parser.add_argument("--runs", type=int, default=20, help="Constructions per measurement")
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeTokenHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    token_uri = f"http://127.0.0.1:{server.server_address[1]}/token"
+    # google-auth ignores the token_uri of a saved token and always refreshes against Google
+    google.oauth2.credentials._GOOGLE_OAUTH2_TOKEN_ENDPOINT = token_uri
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["HARVEST_CACHE_DIR"] = tmp
+        token_file = os.path.join(tmp, "token.json")
+
+        write_token(token_file, token_uri, expired=False)
+        timed("legacy (valid token)", lambda: legacy_start(token_file), args.runs)
+        write_token(token_file, token_uri, expired=False)
+        new_start(token_file)  # populate the discovery cache once
+        timed("lazy SDK, cached discovery (valid token)", lambda: new_start(token_file), args.runs)
+        timed("lazy SDK, construction only", lambda: GoogleCalendarSDK(token_file=token_file), args.runs)
+
+        def expired(start_func):
+            write_token(token_file, token_uri, expired=True)
+            start_func(token_file)
+
+        timed("legacy (expired token)", lambda: expired(legacy_start), args.runs)
+        timed("lazy SDK (expired token)", lambda: expired(new_start), args.runs)
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Micro-benchmark for DateUtils workday checks over 10-year ranges.
+
+Compares the previous per-date approach (weekday check plus holiday lookup for every calendar
+day, with the full list of days materialised) with the precomputed workday bitmap.
+
+    python benchmarks/bench_date_utils.py --repeat 20
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+import _bench_path  # noqa: F401
+
+from utils.date_utils import DateUtils
+
+START = datetime(2016, 1, 1)
+END = datetime(2025, 12, 31)
+
+
+def legacy_workdays(date_utils, start, end):
+    all_dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    return [date for date in all_dates
+            if date.weekday() < 5 and date.date() not in date_utils.get_holidays_for_year(date.year)]
+
+
+def timed(label, func, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func()
+    elapsed = (time.perf_counter() - start) / repeat
+    print(f"{label:<36}{elapsed * 1000:>10.3f} ms   ({result})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="DateUtils workday benchmark")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per measurement")
+    args = parser.parse_args()
+
+    date_utils = DateUtils(country="AU", state="VIC")
+    # Build holiday tables and bitmaps up front so only the lookups are measured
+    date_utils.count_workdays(START, END)
+    days = [START + timedelta(days=i) for i in range((END - START).days + 1)]
+
+    print(f"Range {START:%d/%m/%Y} - {END:%d/%m/%Y} ({len(days)} days)")
+    timed("legacy list of workdays", lambda: len(legacy_workdays(date_utils, START, END)), args.repeat)
+    timed("iter_workdays", lambda: sum(1 for _ in date_utils.iter_workdays(START, END)), args.repeat)
+    timed("count_workdays", lambda: date_utils.count_workdays(START, END), args.repeat)
+    timed("is_workday per day", lambda: sum(1 for day in days if date_utils.is_workday(day)), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+End-to-end benchmark of the main.py fill, show and delete flows against the fake Harvest API.
+
+Each flow runs as its own `main.py` process (through _run_main.py, with bench_harvest_config.py)
+over a week, a month and a year. For every run the wall time, the number of requests the server
+received (and how many were answered 429) and the peak memory of the process are recorded. Runs
+for a range share one cache directory, like consecutive runs by the same user.
+
+    python benchmarks/bench_end_to_end.py
+    python benchmarks/bench_end_to_end.py --latency 0.05 --rate-limit 100/15 --workers 8
+    python benchmarks/bench_end_to_end.py --save baseline.json
+    python benchmarks/bench_end_to_end.py --baseline baseline.json --tolerance 0.2
+
+With --baseline the run fails when wall time, requests or peak memory grow by more than the
+tolerance for any flow.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from fake_harvest_server import FakeHarvestServer, parse_rate_limit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+RUNNER = os.path.join(BENCH_DIR, "_run_main.py")
+
+RANGES = {
+    "week": ("02/06/2025", "06/06/2025"),
+    "month": ("01/06/2025", "30/06/2025"),
+    "year": ("01/01/2025", "31/12/2025"),
+}
+FLOWS = {
+    "fill": [],
+    "show": ["--show"],
+    "delete": ["--delete"],
+}
+COMPARED_METRICS = ("wall_s", "requests", "peak_mb")
+
+
+def run_process(args, env, log):
+    """Run a command and return (exit code, wall seconds, peak RSS in MB or None)"""
+    start = time.perf_counter()
+    process = subprocess.Popen(args, env=env, stdout=log, stderr=subprocess.STDOUT)
+    if not hasattr(os, "wait4"):
+        return process.wait(), time.perf_counter() - start, None
+    # wait4 gives the resource usage of this child alone, including its peak resident memory
+    _, status, usage = os.wait4(process.pid, 0)
+    wall = time.perf_counter() - start
+    process.returncode = os.waitstatus_to_exitcode(status)
+    peak_mb = usage.ru_maxrss / (1024 * 1024 if sys.platform == "darwin" else 1024)
+    return process.returncode, wall, peak_mb
+
+
+def run_suite(server, ranges, flows, workers, log):
+    results = []
+    for range_name in ranges:
+        start, end = RANGES[range_name]
+        with tempfile.TemporaryDirectory(prefix="harvest-bench-") as cache_dir:
+            env = {
+                **os.environ,
+                "HARVEST_BASE_URL": server.base_url,
+                "HARVEST_ACCOUNT_ID": "1",
+                "HARVEST_ACCESS_TOKEN": "bench-token",
+                "HARVEST_CACHE_DIR": cache_dir,
+            }
+            for flow in flows:
+                args = [sys.executable, RUNNER, *FLOWS[flow], f"--start={start}", f"--end={end}", f"--workers={workers}"]
+                server.state.reset_stats()
+                log.write(f"\n$ {' '.join(args[1:])}\n".encode())
+                log.flush()
+                exit_code, wall, peak_mb = run_process(args, env, log)
+                stats = server.state.stats()
+                results.append({
+                    "flow": flow,
+                    "range": range_name,
+                    "wall_s": round(wall, 3),
+                    "requests": stats["requests"],
+                    "rate_limited": stats["rate_limited"],
+                    "peak_mb": round(peak_mb, 1) if peak_mb is not None else None,
+                    "entries_after": len(server.state.entries),
+                    "exit_code": exit_code,
+                })
+                print_row(results[-1])
+    return results
+
+
+def print_header():
+    print(f"{'flow':<8}{'range':<8}{'wall s':>10}{'requests':>10}{'429s':>8}{'peak MB':>10}{'entries':>9}{'exit':>6}")
+
+
+def print_row(row):
+    peak = f"{row['peak_mb']:.1f}" if row["peak_mb"] is not None else "n/a"
+    print(f"{row['flow']:<8}{row['range']:<8}{row['wall_s']:>10.3f}{row['requests']:>10}"
+          f"{row['rate_limited']:>8}{peak:>10}{row['entries_after']:>9}{row['exit_code']:>6}")
+
+
+def compare(results, baseline, tolerance):
+    """Print the change against a saved run and return the regressions beyond the tolerance"""
+    previous = {(row["flow"], row["range"]): row for row in baseline["results"]}
+    regressions = []
+    print(f"\nChange against baseline (tolerance {tolerance:.0%}):")
+    for row in results:
+        old = previous.get((row["flow"], row["range"]))
+        if old is None:
+            continue
+        changes = []
+        for metric in COMPARED_METRICS:
+            if row[metric] is None or not old.get(metric):
+                continue
+            change = (row[metric] - old[metric]) / old[metric]
+            changes.append(f"{metric} {change:+.0%}")
+            if change > tolerance:
+                regressions.append(f"{row['flow']} {row['range']}: {metric} {old[metric]} -> {row[metric]}")
+        print(f"  {row['flow']:<8}{row['range']:<8}{', '.join(changes)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end main.py benchmark against the fake Harvest API")
+    parser.add_argument("--ranges", nargs="+", choices=list(RANGES), default=list(RANGES), help="Date ranges to run")
+    parser.add_argument("--flows", nargs="+", choices=list(FLOWS), default=list(FLOWS), help="Flows to run, in order")
+    parser.add_argument("--workers", type=int, default=1, help="--workers passed to main.py")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the fake server adds to every request")
+    parser.add_argument("--rate-limit", type=parse_rate_limit, help="Per-token limit of the fake server, as REQUESTS/SECONDS (e.g. 100/15)")
+    parser.add_argument("--log", default=os.devnull, help="File receiving the output of main.py")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with results saved by --save")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed growth against the baseline (default: 0.2)")
+    args = parser.parse_args()
+
+    settings = {"workers": args.workers, "latency": args.latency, "rate_limit": args.rate_limit}
+    print(f"Settings: {settings}")
+    print_header()
+    with FakeHarvestServer(latency=args.latency, rate_limit=args.rate_limit) as server, open(args.log, "ab") as log:
+        results = run_suite(server, args.ranges, args.flows, args.workers, log)
+
+    failed = [row for row in results if row["exit_code"] != 0]
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"settings": settings, "results": results}, f, indent=2)
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    for row in failed:
+        print(f"main.py failed for {row['flow']} {row['range']} (exit code {row['exit_code']}), see --log")
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    if failed or regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
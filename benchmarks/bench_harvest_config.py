@@ -0,0 +1,12 @@
+"""harvest_config used by the end-to-end benchmarks, matching the fake server's projects and tasks."""
+
+HOLIDAY_CONFIG = {
+    "country": "AU",
+    "state": "VIC"
+}
+
+timesheet_entries_for_a_day = [
+    {"project_id": 1, "task_id": 100, "project_name": "Project 1", "task_name": "Task 100", "hours": 2, "notes": "Team Management & Strategy"},
+    {"project_id": 2, "task_id": 200, "project_name": "Project 2", "task_name": "Task 200", "hours": 2, "notes": "Internal Meeting"},
+    {"project_id": 1, "task_id": 101, "project_name": "Project 1", "task_name": "Task 101", "hours": 4, "notes": "Development & Technical Work"},
+]
@@ -0,0 +1,62 @@
+"""
+Benchmark the HarvestSDK HTTP transport against a local stand-in server.
+
+Compares one-off `requests.get` calls (a new connection per request, which is what the SDK
+used to do) with the pooled keep-alive session now used by HarvestSDK.
+
+    python benchmarks/bench_http_transport.py --requests 500
+"""
+import argparse
+import os
+import time
+
+import _bench_path  # noqa: F401
+import requests
+
+from fake_harvest_server import FakeHarvestServer
+from harvest.harvest_sdk import HarvestSDK
+from harvest.rate_limiter import RateLimiter
+
+
+def bench_unpooled(sdk, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        response = requests.get(f"{sdk.base_url}/users/me.json", headers=sdk.headers, timeout=sdk.timeout)
+        response.raise_for_status()
+    return count / (time.perf_counter() - start)
+
+
+def bench_pooled(sdk, count):
+    start = time.perf_counter()
+    for _ in range(count):
+        response = sdk._request("GET", "/users/me.json")
+        response.raise_for_status()
+    return count / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HarvestSDK transport benchmark")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per run")
+    args = parser.parse_args()
+
+    with FakeHarvestServer() as server:
+        os.environ["HARVEST_BASE_URL"] = server.base_url
+        # The fake server has no rate limit, so lift the SDK's limiter out of the way
+        sdk = HarvestSDK(account_id="1", access_token="benchmark",
+                         rate_limiter=RateLimiter(max_requests=1_000_000, period=1))
+        # Warm up both paths so interpreter start-up noise is excluded
+        bench_unpooled(sdk, 10)
+        bench_pooled(sdk, 10)
+
+        before = bench_unpooled(sdk, args.requests)
+        after = bench_pooled(sdk, args.requests)
+        sdk.close()
+
+    print(f"{'transport':<28}{'req/s':>10}")
+    print(f"{'requests.get (no pooling)':<28}{before:>10.1f}")
+    print(f"{'HarvestSDK session':<28}{after:>10.1f}")
+    print(f"speed-up: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
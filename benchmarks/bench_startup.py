@@ -0,0 +1,99 @@
+"""
+Cold-start benchmark for the main.py CLI, built on `python -X importtime`.
+
+Runs cheap invocations (--help and an argument error) several times and fails when the
+median import time exceeds the budget in startup_budget.json, or when any of the heavy
+modules listed there gets imported. Modules the bare interpreter already imports (site,
+encodings, .pth hooks of the environment) are left out, so only main.py's own imports count.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+MAIN = os.path.join(os.path.dirname(BENCH_DIR), "src", "main.py")
+BUDGET_FILE = os.path.join(BENCH_DIR, "startup_budget.json")
+
+INVOCATIONS = {
+    "--help": ["--help"],
+    "bad date": ["--date=31/31/2025"],
+}
+
+
+def parse_importtime(stderr, startup_modules=frozenset()):
+    """
+    Return (total import microseconds, set of imported top-level package names), skipping
+    `startup_modules`: a module is only imported once, so those lines belong to interpreter start-up.
+    """
+    total = 0
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.strip() in startup_modules:
+            continue
+        modules.add(name.strip().split(".")[0])
+        # Modules without indentation are imported directly by the script, their cumulative time covers the rest
+        if not name[1:].startswith(" "):
+            total += int(cumulative)
+    return total, modules
+
+
+def interpreter_startup_modules():
+    """Modules imported by `python -c pass` in this environment"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "pass"], capture_output=True, text=True)
+    return frozenset(
+        line.split("|")[2].strip() for line in result.stderr.splitlines()
+        if line.startswith("import time:") and "self [us]" not in line
+    )
+
+
+def measure(args, startup_modules):
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, "-X", "importtime", MAIN, *args], capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    import_us, modules = parse_importtime(result.stderr, startup_modules)
+    return wall, import_us, modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="main.py cold-start benchmark")
+    parser.add_argument("--runs", type=int, default=5, help="Runs per invocation")
+    args = parser.parse_args()
+
+    with open(BUDGET_FILE) as f:
+        budget = json.load(f)
+
+    startup_modules = interpreter_startup_modules()
+    failures = []
+    print(f"{'invocation':<14}{'wall ms':>10}{'import ms':>12}")
+    for label, cli_args in INVOCATIONS.items():
+        runs = [measure(cli_args, startup_modules) for _ in range(args.runs)]
+        wall_ms = statistics.median(run[0] for run in runs) * 1000
+        import_ms = statistics.median(run[1] for run in runs) / 1000
+        print(f"{label:<14}{wall_ms:>10.1f}{import_ms:>12.1f}")
+
+        if import_ms > budget["max_import_ms"]:
+            failures.append(f"{label}: import time {import_ms:.1f} ms exceeds budget of {budget['max_import_ms']} ms")
+        imported = set.union(*(run[2] for run in runs))
+        heavy = sorted(imported.intersection(budget["forbidden_modules"]))
+        if heavy:
+            failures.append(f"{label}: imports heavy modules {', '.join(heavy)}")
+
+    if failures:
+        print("\nStartup regression:")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+    print("\nStartup within budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Memory and throughput benchmark for the TimeEntry model over synthetic Harvest responses.
+
+Builds pages of API-shaped time entries (with the user, client, invoice and timestamp fields
+Harvest sends), decodes them and keeps every entry either as the raw dicts or as TimeEntry
+objects, then measures retained memory and how fast the entries can be totalled per project/task.
+
+    python benchmarks/bench_time_entry_model.py --entries 100000
+"""
+import argparse
+import gc
+import json
+import time
+import tracemalloc
+from datetime import date, timedelta
+
+import _bench_path  # noqa: F401
+
+from harvest.models import TimeEntry
+
+PAGE_SIZE = 2000
+PROJECTS = 20
+TASKS_PER_PROJECT = 5
+
+
+def synthetic_entry(entry_id):
+    project_id = entry_id % PROJECTS
+    task_id = project_id * TASKS_PER_PROJECT + entry_id % TASKS_PER_PROJECT
+    spent_date = (date(2020, 1, 1) + timedelta(days=entry_id % 1500)).isoformat()
+    timestamp = "2025-01-01T09:00:00Z"
+    return {
+        "id": 1_000_000 + entry_id,
+        "spent_date": spent_date,
+        "hours": 2.0,
+        "hours_without_timer": 2.0,
+        "rounded_hours": 2.0,
+        "notes": f"Work item {entry_id % 50}",
+        "is_locked": False,
+        "locked_reason": None,
+        "is_closed": False,
+        "is_billed": False,
+        "timer_started_at": None,
+        "started_time": None,
+        "ended_time": None,
+        "is_running": False,
+        "billable": True,
+        "budgeted": False,
+        "billable_rate": 120.0,
+        "cost_rate": 60.0,
+        "created_at": timestamp,
+        "updated_at": timestamp,
+        "user": {"id": 42, "name": "Sam Example"},
+        "client": {"id": 7, "name": "Example Client", "currency": "AUD"},
+        "project": {"id": project_id, "name": f"Project {project_id}", "code": f"P{project_id}"},
+        "task": {"id": task_id, "name": f"Task {task_id}"},
+        "user_assignment": {"id": 9000 + project_id, "is_project_manager": False, "is_active": True,
+                            "budget": None, "created_at": timestamp, "updated_at": timestamp, "hourly_rate": 120.0},
+        "task_assignment": {"id": 8000 + task_id, "billable": True, "is_active": True,
+                            "created_at": timestamp, "updated_at": timestamp, "hourly_rate": 120.0, "budget": None},
+        "invoice": None,
+        "external_reference": None,
+    }
+
+
+def synthetic_pages(count):
+    """Encoded response bodies, as the SDK would receive them"""
+    return [
+        json.dumps({"time_entries": [synthetic_entry(i) for i in range(start, min(start + PAGE_SIZE, count))]})
+        for start in range(0, count, PAGE_SIZE)
+    ]
+
+
+def load(pages, parse):
+    entries = []
+    for body in pages:
+        entries.extend(parse(data) for data in json.loads(body)["time_entries"])
+    return entries
+
+
+def measure(label, pages, parse, total):
+    # Timed without tracemalloc, which slows allocation-heavy code down several times
+    gc.collect()
+    start = time.perf_counter()
+    entries = load(pages, parse)
+    load_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    hours = total(entries)
+    total_seconds = time.perf_counter() - start
+    del entries
+
+    gc.collect()
+    tracemalloc.start()
+    entries = load(pages, parse)
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del entries
+    print(f"{label:<12}{load_seconds * 1000:>10.1f}{total_seconds * 1000:>10.1f}"
+          f"{retained / 1_048_576:>12.1f}{peak / 1_048_576:>10.1f}   ({len(hours)} project/tasks)")
+
+
+def total_dicts(entries):
+    hours = {}
+    for entry in entries:
+        key = (entry["project"]["name"], entry["task"]["name"])
+        hours[key] = hours.get(key, 0.0) + entry["hours"]
+    return hours
+
+
+def total_models(entries):
+    hours = {}
+    for entry in entries:
+        key = (entry.project.name, entry.task.name)
+        hours[key] = hours.get(key, 0.0) + entry.hours
+    return hours
+
+
+def main():
+    parser = argparse.ArgumentParser(description="TimeEntry model benchmark")
+    parser.add_argument("--entries", type=int, default=100_000, help="Number of synthetic time entries")
+    args = parser.parse_args()
+
+    pages = synthetic_pages(args.entries)
+    print(f"{args.entries} entries in {len(pages)} pages of {PAGE_SIZE}")
+    print(f"{'':<12}{'load ms':>10}{'total ms':>10}{'retained MB':>12}{'peak MB':>10}")
+    measure("raw dicts", pages, lambda data: data, total_dicts)
+    measure("TimeEntry", pages, TimeEntry.from_api, total_models)
+
+
+if __name__ == "__main__":
+    main()
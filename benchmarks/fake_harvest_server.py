@@ -0,0 +1,335 @@
+"""
+Local stand-in for the Harvest v2 API used by the benchmarks.
+
+Only the endpoints the SDK talks to are implemented and everything is kept in memory. Optional
+per-request latency and a per-token rate limit (answering 429 with Retry-After, like Harvest)
+make runs behave more like the real API. GET responses carry an ETag and honour If-None-Match.
+
+    python benchmarks/fake_harvest_server.py --latency 0.05 --rate-limit 100/15
+"""
+import argparse
+import hashlib
+import json
+import math
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlencode, urlparse, parse_qs
+
+FAKE_USER_ID = 1000
+FAKE_PROJECTS = 20
+FAKE_TASKS_PER_PROJECT = 5
+
+
+def _now():
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_rate_limit(value):
+    """Parse "REQUESTS/SECONDS" (e.g. "100/15") into (max_requests, period)"""
+    requests, _, seconds = value.partition("/")
+    return int(requests), float(seconds or 1)
+
+
+class FakeHarvestState:
+    """In-memory time entries and request statistics shared by all request handler threads."""
+
+    def __init__(self, latency=0.0, rate_limit=None):
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.next_id = 1
+        self.latency = latency
+        # (max_requests, period) allowed per access token, like Harvest's 100 requests per 15 seconds
+        self.rate_limit = rate_limit
+        self._request_times = {}
+        self.reset_stats()
+
+    def reset_stats(self):
+        with self.lock:
+            self.request_count = 0
+            self.rate_limited_count = 0
+            self.not_modified_count = 0
+            self.bytes_sent = 0
+            self.requests_by_endpoint = Counter()
+
+    def stats(self):
+        with self.lock:
+            return {
+                "requests": self.request_count,
+                "rate_limited": self.rate_limited_count,
+                "not_modified": self.not_modified_count,
+                "bytes_sent": self.bytes_sent,
+                "by_endpoint": dict(self.requests_by_endpoint),
+            }
+
+    def record_request(self, endpoint):
+        with self.lock:
+            self.request_count += 1
+            self.requests_by_endpoint[endpoint] += 1
+
+    def take_request_slot(self, token):
+        """Count a request against the token's limit. Returns (allowed, remaining, seconds until a slot frees up)."""
+        if self.rate_limit is None:
+            return True, None, None
+        max_requests, period = self.rate_limit
+        now = time.monotonic()
+        with self.lock:
+            times = self._request_times.setdefault(token, deque())
+            while times and now - times[0] >= period:
+                times.popleft()
+            if len(times) >= max_requests:
+                self.rate_limited_count += 1
+                return False, 0, max(1, math.ceil(period - (now - times[0])))
+            times.append(now)
+            return True, max_requests - len(times), max(1, math.ceil(period - (now - times[0])))
+
+    def create_entry(self, payload):
+        with self.lock:
+            entry_id = self.next_id
+            self.next_id += 1
+            entry = {
+                "id": entry_id,
+                "spent_date": payload.get("spent_date"),
+                "hours": payload.get("hours"),
+                "notes": payload.get("notes"),
+                "project": {"id": payload.get("project_id"), "name": f"Project {payload.get('project_id')}"},
+                "task": {"id": payload.get("task_id"), "name": f"Task {payload.get('task_id')}"},
+                "user": {"id": FAKE_USER_ID, "name": "Fake User"},
+                "updated_at": _now(),
+            }
+            self.entries[entry_id] = entry
+            return entry
+
+    def list_entries(self, from_date=None, to_date=None, updated_since=None):
+        with self.lock:
+            entries = list(self.entries.values())
+        if updated_since:
+            entries = [e for e in entries if e["updated_at"] >= updated_since]
+        if from_date:
+            entries = [e for e in entries if e["spent_date"] >= from_date]
+        if to_date:
+            entries = [e for e in entries if e["spent_date"] <= to_date]
+        return sorted(entries, key=lambda e: (e["spent_date"], e["id"]))
+
+    def project_assignments(self):
+        return [
+            {
+                "id": project_id,
+                "is_active": True,
+                "updated_at": "2025-01-01T00:00:00Z",
+                "project": {"id": project_id, "name": f"Project {project_id}"},
+                "client": {"id": 1, "name": "Fake Client"},
+                "task_assignments": [
+                    {"id": task_id, "is_active": True, "task": {"id": task_id, "name": f"Task {task_id}"}}
+                    for task_id in range(project_id * 100, project_id * 100 + FAKE_TASKS_PER_PROJECT)
+                ],
+            }
+            for project_id in range(1, FAKE_PROJECTS + 1)
+        ]
+
+    def update_entry(self, entry_id, payload):
+        with self.lock:
+            entry = self.entries.get(entry_id)
+            if entry is not None:
+                entry.update({key: payload[key] for key in ("spent_date", "hours", "notes") if key in payload})
+                entry["updated_at"] = _now()
+            return entry
+
+    def delete_entry(self, entry_id):
+        with self.lock:
+            return self.entries.pop(entry_id, None) is not None
+
+
+class FakeHarvestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep connections alive between requests
+    # Headers and body go out in separate writes; with Nagle on, a kept-alive connection stalls
+    # on the client's delayed ACK (~40 ms) before every response body
+    disable_nagle_algorithm = True
+    _rate_limit_headers = {}
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body=None, headers=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        headers = dict(headers or {})
+        headers.update(self._rate_limit_headers)
+        if self.command == "GET" and status == 200:
+            etag = '"' + hashlib.sha1(data).hexdigest()[:16] + '"'
+            headers["ETag"] = etag
+            if self.headers.get("If-None-Match") == etag:
+                with self.state.lock:
+                    self.state.not_modified_count += 1
+                status, data = 304, b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers.items():
+            self.send_header(name, str(value))
+        self.end_headers()
+        self.wfile.write(data)
+        with self.state.lock:
+            self.state.bytes_sent += len(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _route(self):
+        """
+        Parse the request path and apply latency and the rate limit. Returns (path, params), or
+        (None, None) when the request was already answered with a 429.
+        """
+        url = urlparse(self.path)
+        path = url.path
+        for prefix in ("/api/v2",):
+            if path.startswith(prefix):
+                path = path[len(prefix):]
+        if path.endswith(".json"):
+            path = path[:-len(".json")]
+        self.state.record_request(f"{self.command} {'/time_entries/{id}' if self._entry_id(path) is not None else path}")
+        if self.state.latency:
+            time.sleep(self.state.latency)
+
+        self._rate_limit_headers = {}
+        allowed, remaining, reset = self.state.take_request_slot(self.headers.get("Authorization"))
+        if remaining is not None:
+            self._rate_limit_headers = {
+                "X-RateLimit-Limit": self.state.rate_limit[0],
+                "X-RateLimit-Remaining": remaining,
+                "X-RateLimit-Reset": reset,
+            }
+        if not allowed:
+            self._send_json(429, {"error": "rate_limited"}, {"Retry-After": reset})
+            return None, None
+        return path, {key: values[-1] for key, values in parse_qs(url.query).items()}
+
+    def _paginate(self, key, entries, params):
+        per_page = int(params.get("per_page", 2000))
+        page = int(params.get("page", 1))
+        total_pages = max(1, -(-len(entries) // per_page))
+        next_link = None
+        if page < total_pages:
+            query = urlencode({**params, "page": page + 1})
+            host, port = self.server.server_address[:2]
+            next_link = f"http://{host}:{port}{urlparse(self.path).path}?{query}"
+        return {
+            key: entries[(page - 1) * per_page:page * per_page],
+            "per_page": per_page,
+            "total_pages": total_pages,
+            "total_entries": len(entries),
+            "page": page,
+            "next_page": page + 1 if next_link else None,
+            "links": {"next": next_link},
+        }
+
+    def do_GET(self):
+        path, params = self._route()
+        if path is None:
+            return
+        if path == "/users/me":
+            self._send_json(200, {"id": FAKE_USER_ID, "first_name": "Fake", "last_name": "User"})
+        elif path == "/users/me/project_assignments":
+            self._send_json(200, self._paginate("project_assignments", self.state.project_assignments(), params))
+        elif path == "/time_entries":
+            entries = self.state.list_entries(params.get("from"), params.get("to"), params.get("updated_since"))
+            self._send_json(200, self._paginate("time_entries", entries, params))
+        else:
+            self._send_json(404, {"error": "not_found"})
+
+    def do_POST(self):
+        path, _ = self._route()
+        if path is None:
+            self._discard_body()
+            return
+        if path == "/time_entries":
+            self._send_json(201, self.state.create_entry(self._read_json()))
+        else:
+            self._send_json(404, {"error": "not_found"})
+
+    def _entry_id(self, path):
+        parts = path.strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "time_entries" and parts[1].isdigit():
+            return int(parts[1])
+        return None
+
+    def _discard_body(self):
+        # Read an unprocessed request body so the kept-alive connection stays in sync
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+
+    def do_PATCH(self):
+        path, _ = self._route()
+        if path is None:
+            self._discard_body()
+            return
+        entry_id = self._entry_id(path)
+        entry = self.state.update_entry(entry_id, self._read_json()) if entry_id is not None else None
+        if entry is not None:
+            self._send_json(200, entry)
+        else:
+            self._send_json(404, {"error": "not_found"})
+
+    def do_DELETE(self):
+        path, _ = self._route()
+        if path is None:
+            return
+        entry_id = self._entry_id(path)
+        if entry_id is not None and self.state.delete_entry(entry_id):
+            self._send_json(200)
+        else:
+            self._send_json(404, {"error": "not_found"})
+
+
+class FakeHarvestServer:
+    """Run the fake Harvest API on a background thread."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, rate_limit=None):
+        self.httpd = ThreadingHTTPServer((host, port), FakeHarvestHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.state = FakeHarvestState(latency=latency, rate_limit=rate_limit)
+        self.thread = None
+
+    @property
+    def state(self):
+        return self.httpd.state
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/api/v2"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake Harvest API for local runs and benchmarks")
+    # Not the daemon's default port (8765), so both can run side by side
+    parser.add_argument("--port", type=int, default=8766, help="Port to listen on (default: 8766)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every request")
+    parser.add_argument("--rate-limit", type=parse_rate_limit, help="Requests allowed per token, as REQUESTS/SECONDS (e.g. 100/15)")
+    args = parser.parse_args()
+    server = FakeHarvestServer(port=args.port, latency=args.latency, rate_limit=args.rate_limit)
+    print(f"Fake Harvest API listening on {server.base_url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
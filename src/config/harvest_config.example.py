@@ -5,6 +5,8 @@ HOLIDAY_CONFIG = {
     "state": "VIC"    # Victoria (Melbourne)
 }
 
+# Entries can reference projects and tasks by name: project_name/task_name are looked up in your
+# Harvest project assignments (cached locally) whenever project_id/task_id are not filled in.
 timesheet_entries_for_a_day = [
     {
         "project_name": "Product & Development",
@@ -30,4 +32,35 @@ timesheet_entries_for_a_day = [
         # "project_id": Fill this with the project ID from Harvest
         # "task_id": Fill this with the task ID from Harvest
     }
-]
\ No newline at end of file
+]
+
+# Optional: build each day's entries from Google Calendar events (use --from-calendar).
+# Time spent in meetings matching a rule is logged against that rule's project/task, overlapping
+# meetings are only counted once, and the rest of the day is split between the entries above.
+CALENDAR_CONFIG = {
+    "calendar_ids": ["primary"],
+    "hours_per_day": 8,
+    "credentials_file": "credentials.json",
+    "token_file": "token.json",
+}
+
+# Checked in order, the first rule matching an event wins. A rule matches when any keyword is in
+# the event title, any guest email is on one of the domains, or the event is on one of the calendars.
+calendar_rules = [
+    {
+        "keywords": ["standup", "retro", "all hands"],
+        "project_name": "General",
+        "task_name": "Internal Meeting",
+        # "project_id": Fill this with the project ID from Harvest
+        # "task_id": Fill this with the task ID from Harvest
+    },
+    # {
+    #     "guest_domains": ["client.com"],
+    #     "calendar_ids": ["team-calendar-id@group.calendar.google.com"],
+    #     "project_name": "Client Project",
+    #     "task_name": "Client Meetings",
+    #     "notes": "Client meetings",
+    #     "project_id": ...,
+    #     "task_id": ...,
+    # },
+]
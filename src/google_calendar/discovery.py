@@ -0,0 +1,35 @@
+import json
+import os
+
+from googleapiclient.discovery_cache import get_static_doc
+from googleapiclient.version import __version__ as client_version
+
+from utils.cache_utils import get_cache_dir, read_json, write_json_atomic
+
+# Only the resources the SDK calls are kept, which keeps the document small to load and build
+USED_RESOURCES = ("events",)
+
+
+def _cache_path(api, version):
+    return os.path.join(get_cache_dir(), "calendar", f"discovery-{api}-{version}-{client_version}.json")
+
+
+def load_discovery_document(api="calendar", version="v3"):
+    """
+    Get the parsed discovery document for an API, trimmed to the resources the SDK uses.
+    The trimmed copy is cached on disk per google-api-python-client version.
+    Returns None when no bundled document is available.
+    """
+    path = _cache_path(api, version)
+    document = read_json(path)
+    if document is not None:
+        return document
+
+    raw = get_static_doc(api, version)
+    if raw is None:
+        return None
+    document = json.loads(raw)
+    document["resources"] = {name: resource for name, resource in document.get("resources", {}).items()
+                             if name in USED_RESOURCES}
+    write_json_atomic(path, document)
+    return document
@@ -0,0 +1,28 @@
+import hashlib
+import os
+
+from utils.cache_utils import get_cache_dir, read_json, write_json_atomic
+
+
+class EventCache:
+    """
+    On-disk copy of one calendar's events plus the Calendar API sync token that keeps it current.
+
+    The state is a dict with "sync_token", the synced "time_min"/"time_max" window (ISO strings)
+    and "events" keyed by event id.
+    """
+
+    def __init__(self, calendar_id, account_key, cache_dir=None):
+        self.calendar_id = calendar_id
+        key = hashlib.sha256(f"{account_key}:{calendar_id}".encode()).hexdigest()[:16]
+        self.path = os.path.join(cache_dir or os.path.join(get_cache_dir(), "calendar"), f"events-{key}.json")
+
+    def load(self):
+        return read_json(self.path, None)
+
+    def save(self, state):
+        write_json_atomic(self.path, state)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -1,35 +1,100 @@
 import datetime
 import os.path
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import google_auth_httplib2
+import httplib2
 
 from google.auth.transport.requests import Request
 from google.oauth2.credentials import Credentials
 from google_auth_oauthlib.flow import InstalledAppFlow
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
+from googleapiclient.discovery import build, build_from_document
+from googleapiclient.errors import BatchError, HttpError
+
+from .discovery import load_discovery_document
+from .event_cache import EventCache
 
 SCOPES = ["https://www.googleapis.com/auth/calendar.readonly"]
+MAX_BATCH_SIZE = 50  # Calendar API limit of calls per batch request
 
 class GoogleCalendarSDK:
+    # Built services shared by every SDK instance in this process, keyed by token file
+    _services = {}
+
     def __init__(self, credentials_file="credentials.json", token_file="token.json"):
         self.credentials_file = credentials_file
         self.token_file = token_file
-        self.service = self.get_calendar_service()
+        self._service = None
+        self._credentials = None
+        self._thread_local = threading.local()
 
-    def get_calendar_service(self):
+    @property
+    def service(self):
+        """Calendar API service, built on first use"""
+        if self._service is None:
+            key = os.path.abspath(self.token_file)
+            if key not in GoogleCalendarSDK._services:
+                GoogleCalendarSDK._services[key] = self.get_calendar_service()
+            self._service = GoogleCalendarSDK._services[key]
+        return self._service
+
+    @service.setter
+    def service(self, service):
+        self._service = service
+
+    def get_credentials(self):
+        """Load the stored credentials, refreshing or re-authorising only when needed"""
         creds = None
         if os.path.exists(self.token_file):
             creds = Credentials.from_authorized_user_file(self.token_file, SCOPES)
-        if not creds or not creds.valid:
-            if creds and creds.expired and creds.refresh_token:
-                creds.refresh(Request())
-            else:
-                flow = InstalledAppFlow.from_client_secrets_file(
-                    self.credentials_file, SCOPES
-                )
-                creds = flow.run_local_server(port=0)
+        if creds and creds.valid:
+            return creds
+
+        if creds and creds.expired and creds.refresh_token:
+            creds.refresh(Request())
+        else:
+            flow = InstalledAppFlow.from_client_secrets_file(
+                self.credentials_file, SCOPES
+            )
+            creds = flow.run_local_server(port=0)
+        # Only written when the credentials actually changed
         with open(self.token_file, "w") as token:
             token.write(creds.to_json())
-        return build("calendar", "v3", credentials=creds)
+        return creds
+
+    def get_calendar_service(self):
+        creds = self._credentials = self.get_credentials()
+        document = load_discovery_document("calendar", "v3")
+        if document is None:
+            return build("calendar", "v3", credentials=creds)
+        return build_from_document(document, credentials=creds)
+
+    @staticmethod
+    def _format_event(event):
+        start = event["start"].get("dateTime", event["start"].get("date"))
+        end = event["end"].get("dateTime", event["end"].get("date"))
+        summary = event.get("summary", "(No Title)")
+        attendees = event.get("attendees", [])
+        guest_list = [a.get("email", "Unknown") for a in attendees] if attendees else []
+        return {
+            "id": event.get("id"),
+            "summary": summary,
+            "start": start,
+            "end": end,
+            "guests": guest_list,
+            "ical_uid": event.get("iCalUID")
+        }
+
+    def _iter_pages(self, **list_kwargs):
+        """Yield every page of an events().list call, following nextPageToken"""
+        page_token = None
+        while True:
+            page = self.service.events().list(pageToken=page_token, **list_kwargs).execute()
+            yield page
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                break
 
     def get_events_in_day(self, target_date, calendar_id="primary"):
         """Get all events for a particular day."""
@@ -37,37 +102,275 @@ class GoogleCalendarSDK:
             date_obj = datetime.datetime.strptime(target_date, "%Y-%m-%d")
             start_of_day = date_obj.replace(hour=0, minute=0, second=0, microsecond=0, tzinfo=datetime.timezone.utc)
             end_of_day = date_obj.replace(hour=23, minute=59, second=59, microsecond=999999, tzinfo=datetime.timezone.utc)
-            events_result = (
-                self.service.events()
-                .list(
-                    calendarId=calendar_id,
-                    timeMin=start_of_day.isoformat(),
-                    timeMax=end_of_day.isoformat(),
-                    singleEvents=True,
-                    orderBy="startTime",
-                )
-                .execute()
-            )
-            events = events_result.get("items", [])
             event_list = []
-            for event in events:
-                start = event["start"].get("dateTime", event["start"].get("date"))
-                end = event["end"].get("dateTime", event["end"].get("date"))
-                summary = event.get("summary", "(No Title)")
-                attendees = event.get("attendees", [])
-                guest_list = [a.get("email", "Unknown") for a in attendees] if attendees else []
-                event_list.append({
-                    "id": event.get("id"),
-                    "summary": summary,
-                    "start": start,
-                    "end": end,
-                    "guests": guest_list
-                })
+            for page in self._iter_pages(
+                calendarId=calendar_id,
+                timeMin=start_of_day.isoformat(),
+                timeMax=end_of_day.isoformat(),
+                singleEvents=True,
+                orderBy="startTime",
+            ):
+                event_list.extend(self._format_event(event) for event in page.get("items", []))
             return event_list
         except HttpError as error:
             print(f"An error occurred: {error}")
             return []
 
+    @staticmethod
+    def _event_start(event):
+        """Start of an event as an aware datetime (all-day events start at local midnight)"""
+        if "T" not in event["start"]:
+            return datetime.datetime.combine(datetime.date.fromisoformat(event["start"]), datetime.time.min).astimezone()
+        return datetime.datetime.fromisoformat(event["start"].replace("Z", "+00:00"))
+
+    @staticmethod
+    def _event_days(event):
+        """Local days (YYYY-MM-DD) an event belongs to: its start day, or every day of an all-day event"""
+        if "T" not in event["start"]:
+            day = datetime.date.fromisoformat(event["start"])
+            last = datetime.date.fromisoformat(event["end"])  # exclusive
+            days = []
+            while day < last:
+                days.append(day.isoformat())
+                day += datetime.timedelta(days=1)
+            return days or [event["start"]]
+        start = datetime.datetime.fromisoformat(event["start"].replace("Z", "+00:00"))
+        return [start.astimezone().date().isoformat()]
+
+    def _full_sync(self, calendar_id, time_min, time_max):
+        events = {}
+        sync_token = None
+        for page in self._iter_pages(calendarId=calendar_id, timeMin=time_min, timeMax=time_max, singleEvents=True):
+            for event in page.get("items", []):
+                if event.get("status") != "cancelled":
+                    events[event["id"]] = self._format_event(event)
+            sync_token = page.get("nextSyncToken")
+        return {"sync_token": sync_token, "time_min": time_min, "time_max": time_max, "events": events}
+
+    def _incremental_sync(self, calendar_id, state):
+        """Apply the changes since the stored sync token. Returns False when the token has expired."""
+        try:
+            for page in self._iter_pages(calendarId=calendar_id, syncToken=state["sync_token"], singleEvents=True):
+                for event in page.get("items", []):
+                    if event.get("status") == "cancelled":
+                        state["events"].pop(event["id"], None)
+                    else:
+                        state["events"][event["id"]] = self._format_event(event)
+                if page.get("nextSyncToken"):
+                    state["sync_token"] = page["nextSyncToken"]
+        except HttpError as error:
+            # 410 Gone: the token is no longer valid and a full sync is required
+            if error.resp.status == 410:
+                return False
+            raise
+        return True
+
+    def get_events_in_range(self, start_date, end_date, calendar_id="primary", use_cache=True):
+        """
+        Get all events between two dates (YYYY-MM-DD, inclusive) grouped by local day.
+
+        The window is fetched as one paginated stream. With `use_cache` the events are kept on disk
+        and later calls only fetch what changed through the Calendar API sync token.
+
+        Returns:
+            Dict of YYYY-MM-DD -> list of events ordered by start time (every day in the range is present)
+        """
+        first_day = datetime.date.fromisoformat(start_date)
+        last_day = datetime.date.fromisoformat(end_date)
+        # Day boundaries in local time
+        time_min = datetime.datetime.combine(first_day, datetime.time.min).astimezone().isoformat()
+        time_max = datetime.datetime.combine(last_day + datetime.timedelta(days=1), datetime.time.min).astimezone().isoformat()
+
+        try:
+            cache = EventCache(calendar_id, os.path.abspath(self.token_file)) if use_cache else None
+            state = cache.load() if cache else None
+            parse = datetime.datetime.fromisoformat
+            covered = (state and state.get("sync_token")
+                       and parse(state["time_min"]) <= parse(time_min) and parse(state["time_max"]) >= parse(time_max))
+            if not (covered and self._incremental_sync(calendar_id, state)):
+                if state:
+                    # Keep the cached window when extending it
+                    time_min = min(time_min, state["time_min"], key=parse)
+                    time_max = max(time_max, state["time_max"], key=parse)
+                state = self._full_sync(calendar_id, time_min, time_max)
+            if cache:
+                cache.save(state)
+        except HttpError as error:
+            print(f"An error occurred: {error}")
+            return {}
+
+        events_by_day = {}
+        day = first_day
+        while day <= last_day:
+            events_by_day[day.isoformat()] = []
+            day += datetime.timedelta(days=1)
+        for event in state["events"].values():
+            for event_day in self._event_days(event):
+                if event_day in events_by_day:
+                    events_by_day[event_day].append(event)
+        for day_events in events_by_day.values():
+            day_events.sort(key=self._event_start)
+        return events_by_day
+
+    def _list_request(self, calendar_id, time_min, time_max, page_token=None):
+        return self.service.events().list(
+            calendarId=calendar_id, timeMin=time_min, timeMax=time_max,
+            singleEvents=True, pageToken=page_token
+        )
+
+    def _fetch_batched(self, windows):
+        """
+        Fetch every page for several calendars, sending the list calls in batch HTTP requests.
+        `windows` maps calendar IDs to (time_min, time_max). Returns {calendar_id: (events, sync token)},
+        leaving out calendars that could not be read.
+        """
+        events = {calendar_id: [] for calendar_id in windows}
+        sync_tokens = {}
+        failed = set()
+        pending = [(calendar_id, None) for calendar_id in windows]
+        while pending:
+            next_pending = []
+
+            def callback(request_id, response, exception):
+                calendar_id = pending[int(request_id)][0]
+                if exception is not None:
+                    # One unreadable calendar should not hide the others
+                    print(f"An error occurred for calendar {calendar_id}: {exception}")
+                    failed.add(calendar_id)
+                    return
+                events[calendar_id].extend(response.get("items", []))
+                if response.get("nextPageToken"):
+                    next_pending.append((calendar_id, response["nextPageToken"]))
+                else:
+                    sync_tokens[calendar_id] = response.get("nextSyncToken")
+
+            for chunk_start in range(0, len(pending), MAX_BATCH_SIZE):
+                batch = self.service.new_batch_http_request(callback=callback)
+                for i in range(chunk_start, min(chunk_start + MAX_BATCH_SIZE, len(pending))):
+                    calendar_id, page_token = pending[i]
+                    batch.add(self._list_request(calendar_id, *windows[calendar_id], page_token), request_id=str(i))
+                batch.execute()
+            pending = next_pending
+        return {calendar_id: (events[calendar_id], sync_tokens.get(calendar_id))
+                for calendar_id in windows if calendar_id not in failed}
+
+    def _thread_http(self):
+        # httplib2 connections are not thread-safe, so every worker thread gets its own
+        if not hasattr(self._thread_local, "http"):
+            self._thread_local.http = google_auth_httplib2.AuthorizedHttp(self._credentials, http=httplib2.Http())
+        return self._thread_local.http
+
+    def _fetch_calendar(self, calendar_id, time_min, time_max):
+        items = []
+        page_token = None
+        while True:
+            request = self._list_request(calendar_id, time_min, time_max, page_token)
+            page = request.execute(http=self._thread_http()) if self._credentials else request.execute()
+            items.extend(page.get("items", []))
+            page_token = page.get("nextPageToken")
+            if not page_token:
+                return items, page.get("nextSyncToken")
+
+    def _fetch_parallel(self, windows):
+        """Fallback when batching fails: one thread per calendar (sequential without own credentials)"""
+        calendar_ids = list(windows)
+        workers = min(len(calendar_ids), 8) if self._credentials else 1
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(lambda calendar_id: self._fetch_calendar(calendar_id, *windows[calendar_id]), calendar_ids)
+            return dict(zip(calendar_ids, results))
+
+    def get_events_for_calendars(self, start_date, end_date, calendar_ids, use_cache=True):
+        """
+        Get the events of several calendars between two dates (YYYY-MM-DD, inclusive), grouped by local day.
+
+        With `use_cache` every calendar shares the on-disk cache of get_events_in_range: calendars
+        whose cached window covers the range only fetch what changed through their sync token. The
+        others are queried at once through batch HTTP requests (or in parallel if batching fails).
+        Events appearing on several calendars, such as a meeting on both the primary and a team
+        calendar, are only returned once. Each event has a "calendar_id" of the first calendar listing it.
+
+        Returns:
+            Dict of YYYY-MM-DD -> list of events ordered by start time (every day in the range is present)
+        """
+        calendar_ids = list(dict.fromkeys(calendar_ids))
+        first_day = datetime.date.fromisoformat(start_date)
+        last_day = datetime.date.fromisoformat(end_date)
+        time_min = datetime.datetime.combine(first_day, datetime.time.min).astimezone().isoformat()
+        time_max = datetime.datetime.combine(last_day + datetime.timedelta(days=1), datetime.time.min).astimezone().isoformat()
+        parse = datetime.datetime.fromisoformat
+
+        states = {}
+        caches = {}
+        windows = {}
+        for calendar_id in calendar_ids:
+            cache = caches[calendar_id] = EventCache(calendar_id, os.path.abspath(self.token_file)) if use_cache else None
+            state = cache.load() if cache else None
+            covered = (state and state.get("sync_token")
+                       and parse(state["time_min"]) <= parse(time_min) and parse(state["time_max"]) >= parse(time_max))
+            try:
+                synced = covered and self._incremental_sync(calendar_id, state)
+            except HttpError as error:
+                print(f"An error occurred for calendar {calendar_id}, fetching it again: {error}")
+                synced = False
+            if synced:
+                states[calendar_id] = state
+                cache.save(state)
+            elif state:
+                # Keep the cached window when extending it
+                windows[calendar_id] = (min(time_min, state["time_min"], key=parse), max(time_max, state["time_max"], key=parse))
+            else:
+                windows[calendar_id] = (time_min, time_max)
+
+        if windows:
+            try:
+                fetched = self._fetch_batched(windows)
+            except (BatchError, httplib2.HttpLib2Error, OSError) as error:
+                print(f"Batch request failed ({error}), fetching calendars in parallel instead")
+                try:
+                    fetched = self._fetch_parallel(windows)
+                except HttpError as error:
+                    print(f"An error occurred: {error}")
+                    return {}
+            for calendar_id, (items, sync_token) in fetched.items():
+                states[calendar_id] = {
+                    "sync_token": sync_token,
+                    "time_min": windows[calendar_id][0],
+                    "time_max": windows[calendar_id][1],
+                    "events": {event["id"]: self._format_event(event) for event in items if event.get("status") != "cancelled"},
+                }
+                if caches[calendar_id]:
+                    caches[calendar_id].save(states[calendar_id])
+
+        events_by_day = {}
+        day = first_day
+        while day <= last_day:
+            events_by_day[day.isoformat()] = []
+            day += datetime.timedelta(days=1)
+
+        seen = set()
+        for calendar_id in calendar_ids:
+            if calendar_id not in states:
+                continue
+            for cached_event in states[calendar_id]["events"].values():
+                # The same meeting keeps its iCalUID on every calendar, the start separates recurring instances.
+                # Each calendar reports times in its own zone, so starts are compared as instants
+                key = (cached_event.get("ical_uid") or cached_event["id"], self._event_start(cached_event))
+                if key in seen:
+                    continue
+                seen.add(key)
+                event = dict(cached_event, calendar_id=calendar_id)
+                for event_day in self._event_days(event):
+                    if event_day in events_by_day:
+                        events_by_day[event_day].append(event)
+
+        for day_events in events_by_day.values():
+            day_events.sort(key=self._event_start)
+        return events_by_day
+
+    def get_events_in_day_for_calendars(self, target_date, calendar_ids):
+        """Get the merged, de-duplicated events of several calendars for one day (YYYY-MM-DD)."""
+        return self.get_events_for_calendars(target_date, target_date, calendar_ids).get(target_date, [])
+
 if __name__ == "__main__":
     sdk = GoogleCalendarSDK()
 
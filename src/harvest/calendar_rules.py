@@ -0,0 +1,181 @@
+import heapq
+from collections import deque
+from datetime import datetime
+
+HOURS_STEP = 0.25  # entries are rounded to quarter hours
+
+
+class KeywordAutomaton:
+    """Aho-Corasick automaton finding every rule whose keyword occurs in a text in one pass."""
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]  # lowest rule index ending at each state
+
+    def add(self, keyword, rule_index):
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto[state][char] = next_state
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+            state = next_state
+        if self.output[state] is None or rule_index < self.output[state]:
+            self.output[state] = rule_index
+
+    def build(self):
+        """Compute failure links breadth first, folding each state's suffix outputs into it"""
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and char not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(char, 0)
+                suffix_output = self.output[self.fail[next_state]]
+                if suffix_output is not None and (self.output[next_state] is None or suffix_output < self.output[next_state]):
+                    self.output[next_state] = suffix_output
+
+    def best_match(self, text):
+        """Lowest rule index with a keyword in the text, or None"""
+        best = None
+        state = 0
+        goto, fail, output = self.goto, self.fail, self.output
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            match = output[state]
+            if match is not None and (best is None or match < best):
+                best = match
+                if best == 0:
+                    break
+        return best
+
+
+class CalendarRuleEngine:
+    """
+    Turns calendar events into Harvest time entries.
+
+    Rules are checked in order and the first matching rule wins. A rule matches an event when any
+    of its "keywords" appears in the summary (case-insensitive), any guest email belongs to one of
+    its "guest_domains", or the event comes from one of its "calendar_ids". The rules are compiled
+    into a keyword automaton and hash maps, so matching an event does not scan the rule list.
+    """
+
+    def __init__(self, rules, default_entries, hours_per_day=8):
+        """
+        Args:
+            rules: Dicts with matching criteria plus project_id, task_id, project_name, task_name and optional notes
+            default_entries: Entries (like timesheet_entries_for_a_day) sharing the hours not covered by meetings
+            hours_per_day: Target hours for a workday
+        """
+        self.rules = rules
+        self.default_entries = default_entries
+        self.hours_per_day = hours_per_day
+        self.keywords = KeywordAutomaton()
+        self.domains = {}
+        self.calendars = {}
+        for index, rule in enumerate(rules):
+            for keyword in rule.get("keywords", []):
+                self.keywords.add(keyword.lower(), index)
+            for domain in rule.get("guest_domains", []):
+                self.domains.setdefault(domain.lower(), index)
+            for calendar_id in rule.get("calendar_ids", []):
+                self.calendars.setdefault(calendar_id, index)
+        self.keywords.build()
+
+    def match(self, event):
+        """Index of the rule matching an event, or None"""
+        best = self.keywords.best_match(event.get("summary", "").lower())
+        candidates = [self.calendars.get(event.get("calendar_id"))]
+        for guest in event.get("guests", []):
+            candidates.append(self.domains.get(guest.rpartition("@")[2].lower()))
+        for candidate in candidates:
+            if candidate is not None and (best is None or candidate < best):
+                best = candidate
+        return best
+
+    @staticmethod
+    def _parse(timestamp):
+        return datetime.fromisoformat(timestamp.replace("Z", "+00:00")).timestamp()
+
+    def _matched_seconds(self, events):
+        """
+        Seconds per rule for a day's events. Overlapping events are merged: each moment is counted
+        once, for the highest priority rule among the events running at that time.
+        """
+        boundaries = []
+        summaries = {}
+        for event in events:
+            if "T" not in event["start"]:
+                continue  # all-day events carry no working time
+            rule_index = self.match(event)
+            if rule_index is None:
+                continue
+            start, end = self._parse(event["start"]), self._parse(event["end"])
+            if end > start:
+                boundaries.append((start, 1, rule_index))
+                boundaries.append((end, 0, rule_index))
+                summaries.setdefault(rule_index, {})[event.get("summary", "")] = None
+        boundaries.sort()
+
+        seconds = {}
+        active = []  # heap of running rule indexes, ended ones are removed lazily
+        ended = {}
+        previous = None
+        for time, is_start, rule_index in boundaries:
+            while active and ended.get(active[0]):
+                ended[active[0]] -= 1
+                heapq.heappop(active)
+            if active and previous is not None and time > previous:
+                seconds[active[0]] = seconds.get(active[0], 0) + time - previous
+            if is_start:
+                heapq.heappush(active, rule_index)
+            else:
+                ended[rule_index] = ended.get(rule_index, 0) + 1
+            previous = time
+        return seconds, summaries
+
+    @staticmethod
+    def _round(hours):
+        return round(hours / HOURS_STEP) * HOURS_STEP
+
+    def entries_for_day(self, events):
+        """Build the Harvest entries for one day's events, topped up with the default entries"""
+        seconds, summaries = self._matched_seconds(events)
+        entries = []
+        for rule_index in sorted(seconds):
+            hours = self._round(seconds[rule_index] / 3600)
+            if hours <= 0:
+                continue
+            rule = self.rules[rule_index]
+            entries.append({
+                "project_name": rule.get("project_name", ""),
+                "task_name": rule.get("task_name", ""),
+                "project_id": rule["project_id"],
+                "task_id": rule["task_id"],
+                "hours": hours,
+                "notes": rule.get("notes") or "; ".join(summary for summary in summaries[rule_index] if summary),
+            })
+
+        remaining = self.hours_per_day - sum(entry["hours"] for entry in entries)
+        default_total = sum(entry["hours"] for entry in self.default_entries)
+        if remaining > 0 and default_total > 0:
+            allocated = 0
+            for i, default in enumerate(self.default_entries):
+                # Split in proportion to the configured hours, the last entry absorbs rounding
+                if i == len(self.default_entries) - 1:
+                    hours = remaining - allocated
+                else:
+                    hours = self._round(remaining * default["hours"] / default_total)
+                allocated += hours
+                if hours > 0:
+                    entries.append({**default, "hours": hours})
+        return entries
@@ -0,0 +1,284 @@
+import hmac
+import importlib
+import json
+import os
+import secrets
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+import config.harvest_config as harvest_config
+from utils.cache_utils import daemon_token_path
+from utils.date_utils import DateUtils
+from .harvest_controller import HarvestController
+from .instrumentation import RequestMetrics
+
+DEFAULT_FILL_TIME = "17:00"
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CONFIG_CHECK_SECONDS = 60
+RUN_HISTORY = 20
+MAX_FILL_DAYS = 31
+TOKEN_HEADER = "X-Harvest-Daemon-Token"
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+class FillDaemon:
+    """
+    Long-running fill service that keeps everything a fill needs warm in memory: the SDK session
+    and its pooled connections, the user identity, the project catalog and the holiday calendars.
+
+    Every day at `fill_time` the day is filled if DateUtils says it is a workday. harvest_config.py
+    is reloaded when it changes on disk. A small HTTP server on localhost reports the status and
+    accepts ad-hoc fills:
+
+        GET  /status                               daemon state and recent runs (JSON)
+        GET  /metrics                              Harvest request metrics (Prometheus text)
+        POST /fill[?date=DD/MM/YYYY | ?start=..&end=..]   fill now (today by default)
+
+    Days that already have time entries are skipped, so a fill is safe to trigger again. Requests
+    must come from a loopback Host without an Origin header (browsers always send one), and
+    POST /fill also needs the secret the daemon writes to daemon_token_path(port) (mode 0600)
+    in the X-Harvest-Daemon-Token header. A fill covers at most MAX_FILL_DAYS days.
+    """
+
+    def __init__(self, fill_time=DEFAULT_FILL_TIME, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=1):
+        self.fill_time = datetime.strptime(fill_time, "%H:%M").time()
+        self.host = host
+        self.port = port
+        # The SQLite store is bound to the thread that opened it and fills run on the HTTP threads;
+        # a fill only checks a few days, so those are read from Harvest (through the response cache)
+        self.controller = HarvestController(workers=workers, use_store=False)
+        self.metrics = RequestMetrics()
+        self.controller.sdk.add_hook(self.metrics)
+        self.date_utils = None
+        self.config_path = harvest_config.__file__
+        self.config_mtime = None
+        self.config_loaded_at = None
+        self.started_at = datetime.now()
+        self.next_run = None
+        self.runs = deque(maxlen=RUN_HISTORY)
+        self._run_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._server = None
+        self.token = secrets.token_urlsafe(32)
+        self.token_path = daemon_token_path(port)
+        self.reload_config_if_changed()
+
+    def reload_config_if_changed(self):
+        """Re-import harvest_config when the file changed; a broken edit keeps the previous config"""
+        mtime = os.stat(self.config_path).st_mtime
+        if mtime == self.config_mtime:
+            return False
+        if self.config_mtime is not None:
+            try:
+                importlib.reload(harvest_config)
+            except Exception as e:
+                # Don't retry the same broken file every minute
+                self.config_mtime = mtime
+                print(f"Could not reload {self.config_path}, keeping the previous config: {e}")
+                return False
+            print(f"Reloaded {self.config_path}")
+        self.config_mtime = mtime
+        self.config_loaded_at = datetime.now()
+        self.controller.set_entry_template(harvest_config.timesheet_entries_for_a_day)
+        region = (harvest_config.HOLIDAY_CONFIG["country"], harvest_config.HOLIDAY_CONFIG["state"])
+        if self.date_utils is None or (self.date_utils.country, self.date_utils.state) != region:
+            self.date_utils = DateUtils(country=region[0], state=region[1])
+        return True
+
+    def warm_up(self):
+        """Load the identity, project catalog and this year's holidays before the first fill"""
+        today = datetime.today()
+        self.date_utils.is_workday(today)
+        try:
+            self.controller.sdk.get_user()
+            self.controller.entries_for_day(today.strftime("%Y-%m-%d"))
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Could not warm up the Harvest state, it will be loaded on the first fill: {e}")
+
+    def fill(self, dates, reason):
+        """Fill the workdays among `dates` that have no entries yet. Returns a record of the run."""
+        with self._run_lock:
+            self.reload_config_if_changed()
+            start = time.perf_counter()
+            record = {
+                "reason": reason,
+                "started_at": datetime.now().isoformat(timespec="seconds"),
+                "filled": [],
+                "already_filled": [],
+                "not_workdays": [],
+                "failed": 0,
+            }
+            workdays = []
+            for date in dates:
+                if self.date_utils.is_workday(date):
+                    workdays.append(date)
+                else:
+                    record["not_workdays"].append(date.strftime("%Y-%m-%d"))
+            try:
+                if workdays:
+                    first_date, last_date = min(workdays), max(workdays)
+                    filled_days = {entry.spent_date for entry in self.controller.iter_entries(
+                        first_date.strftime("%d/%m/%Y"), last_date.strftime("%d/%m/%Y"))}
+                    to_fill = []
+                    for date in workdays:
+                        spent_date = date.strftime("%Y-%m-%d")
+                        if spent_date in filled_days:
+                            record["already_filled"].append(spent_date)
+                        else:
+                            record["filled"].append(spent_date)
+                            to_fill.append(date)
+                    if to_fill:
+                        record["failed"] = self._fill_days(to_fill)
+            except (requests.exceptions.RequestException, ValueError) as e:
+                record["failed"] += 1
+                record["error"] = str(e)
+                print(f"Fill failed: {e}")
+            record["seconds"] = round(time.perf_counter() - start, 3)
+            self.runs.append(record)
+            return record
+
+    def _fill_days(self, dates):
+        # A journal left behind by an interrupted run over the same days is resumed
+        name = f"daemon-{min(dates):%Y%m%d}-{max(dates):%Y%m%d}"
+        self.controller.open_journal(name, resume=os.path.exists(self.controller.journal_path(name)))
+        completed = False
+        try:
+            failed = self.controller.fill_timesheets(dates)
+            completed = failed == 0
+        finally:
+            self.controller.close_journal(completed)
+        return failed
+
+    def _next_run_after(self, now):
+        candidate = datetime.combine(now.date(), self.fill_time)
+        return candidate if candidate > now else candidate + timedelta(days=1)
+
+    def status(self):
+        return {
+            "started_at": self.started_at.isoformat(timespec="seconds"),
+            "fill_time": self.fill_time.strftime("%H:%M"),
+            "next_run": self.next_run.isoformat(timespec="seconds") if self.next_run else None,
+            "config_loaded_at": self.config_loaded_at.isoformat(timespec="seconds"),
+            "busy": self._run_lock.locked(),
+            "runs": list(self.runs),
+        }
+
+    def serve_forever(self):
+        """Run the scheduler and the local HTTP endpoint until interrupted"""
+        self._server = ThreadingHTTPServer((self.host, self.port), _DaemonRequestHandler)
+        self._server.fill_daemon = self
+        # Written once the port is ours, so a second daemon on the same port can't replace it
+        self._write_token()
+        threading.Thread(target=self._server.serve_forever, name="daemon-http", daemon=True).start()
+        print(f"Listening on http://{self.host}:{self.port} (status: GET /status, fill now: POST /fill)")
+
+        self.warm_up()
+        self.next_run = self._next_run_after(datetime.now())
+        print(f"Next scheduled fill at {self.next_run:%d/%m/%Y %H:%M}")
+        try:
+            while not self._stop.is_set():
+                now = datetime.now()
+                if now >= self.next_run:
+                    day = datetime.combine(self.next_run.date(), datetime.min.time())
+                    self.fill([day], "schedule")
+                    self.next_run = self._next_run_after(datetime.now())
+                    print(f"Next scheduled fill at {self.next_run:%d/%m/%Y %H:%M}")
+                    continue
+                self._stop.wait(min(CONFIG_CHECK_SECONDS, (self.next_run - now).total_seconds()))
+                with self._run_lock:
+                    self.reload_config_if_changed()
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            self.controller.sdk.close()
+            if os.path.exists(self.token_path):
+                os.remove(self.token_path)
+
+    def _write_token(self):
+        # Recreated rather than overwritten, so the file never keeps looser permissions
+        if os.path.exists(self.token_path):
+            os.remove(self.token_path)
+        fd = os.open(self.token_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "w") as f:
+            f.write(self.token)
+
+    def stop(self):
+        self._stop.set()
+
+
+def _dates_from_query(params):
+    """Dates to fill from ?date= or ?start=&end= (DD/MM/YYYY, at most MAX_FILL_DAYS), today by default"""
+    if "date" in params:
+        return [datetime.strptime(params["date"][0], "%d/%m/%Y")]
+    if "start" in params and "end" in params:
+        start = datetime.strptime(params["start"][0], "%d/%m/%Y")
+        end = datetime.strptime(params["end"][0], "%d/%m/%Y")
+        if end < start:
+            raise ValueError("end is before start")
+        if (end - start).days >= MAX_FILL_DAYS:
+            raise ValueError(f"a fill covers at most {MAX_FILL_DAYS} days")
+        return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+    today = datetime.today()
+    return [datetime(today.year, today.month, today.day)]
+
+
+class _DaemonRequestHandler(BaseHTTPRequestHandler):
+    def _send(self, status, body, content_type="application/json"):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _send_json(self, status, payload):
+        self._send(status, json.dumps(payload, indent=2) + "\n")
+
+    def _refuse(self, needs_token=False):
+        """Send an error and return True unless the request comes from a local client (with the token)"""
+        # Any web page can send requests to localhost; browsers always add an Origin header to them,
+        # and a DNS rebinding attack shows up as a non-loopback Host
+        if self.headers.get("Origin") is not None:
+            self._send_json(403, {"error": "Cross-origin requests are not allowed"})
+            return True
+        if urlparse(f"//{self.headers.get('Host', '')}").hostname not in LOOPBACK_HOSTS:
+            self._send_json(403, {"error": "Host must be a loopback address"})
+            return True
+        token = self.headers.get(TOKEN_HEADER, "")
+        if needs_token and not hmac.compare_digest(token.encode(), self.server.fill_daemon.token.encode()):
+            self._send_json(401, {"error": f"Missing or wrong {TOKEN_HEADER} header"})
+            return True
+        return False
+
+    def do_GET(self):
+        if self._refuse():
+            return
+        path = urlparse(self.path).path
+        if path == "/status":
+            self._send_json(200, self.server.fill_daemon.status())
+        elif path == "/metrics":
+            self._send(200, self.server.fill_daemon.metrics.to_prometheus(), "text/plain; version=0.0.4")
+        else:
+            self._send_json(404, {"error": f"Unknown path {path}"})
+
+    def do_POST(self):
+        if self._refuse(needs_token=True):
+            return
+        url = urlparse(self.path)
+        if url.path != "/fill":
+            self._send_json(404, {"error": f"Unknown path {url.path}"})
+            return
+        try:
+            dates = _dates_from_query(parse_qs(url.query))
+        except ValueError as e:
+            self._send_json(400, {"error": f"Invalid dates: {e}"})
+            return
+        record = self.server.fill_daemon.fill(dates, "trigger")
+        self._send_json(500 if record["failed"] else 200, record)
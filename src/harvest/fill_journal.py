@@ -0,0 +1,89 @@
+import json
+import os
+import threading
+
+# Fields kept for each planned entry, enough to replay the plan and recognise the entry in Harvest
+ENTRY_FIELDS = ("project_id", "task_id", "project_name", "task_name", "hours", "notes")
+
+
+class FillJournal:
+    """
+    Append-only JSON lines journal of a fill run, so an interrupted run can be resumed.
+
+    A "plan" record lists the entries for a day before any of them is sent, and a "done" record
+    is appended after each successful create with the new entry ID. Records are flushed to the
+    OS as they are written (which survives a crash or Ctrl-C of the process) and only fsynced
+    on close, keeping each write to a single small append.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.planned = {}  # spent_date -> planned entries
+        self.done = {}  # (spent_date, index) -> Harvest entry ID
+        if resume:
+            self._replay()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+        self._lock = threading.Lock()
+        if resume and self._file.tell() > 0 and not self._ends_with_newline():
+            # Terminate a record cut short by the interruption so the next one starts on its own line
+            self._file.write("\n")
+            self._file.flush()
+
+    def _ends_with_newline(self):
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _replay(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by the interruption
+                    if record["op"] == "plan":
+                        self.planned.setdefault(record["day"], record["entries"])
+                    elif record["op"] == "done":
+                        self.done[(record["day"], record["index"])] = record["entry_id"]
+        except FileNotFoundError:
+            pass
+
+    def _append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+
+    def plan_day(self, spent_date, entries):
+        """Record the entries planned for a day, returning the plan to use (an earlier plan wins on resume)"""
+        if spent_date not in self.planned:
+            self.planned[spent_date] = [{field: entry.get(field) for field in ENTRY_FIELDS} for entry in entries]
+            self._append({"op": "plan", "day": spent_date, "entries": self.planned[spent_date]})
+        return self.planned[spent_date]
+
+    def mark_done(self, spent_date, index, entry_id):
+        self.done[(spent_date, index)] = entry_id
+        self._append({"op": "done", "day": spent_date, "index": index, "entry_id": entry_id})
+
+    def is_done(self, spent_date, index):
+        return (spent_date, index) in self.done
+
+    def in_doubt(self):
+        """Planned entries without a done record: they may or may not have reached Harvest"""
+        return [
+            (spent_date, index, entry)
+            for spent_date, entries in sorted(self.planned.items())
+            for index, entry in enumerate(entries)
+            if (spent_date, index) not in self.done
+        ]
+
+    def close(self, remove=False):
+        """Close the journal, deleting it when the run finished without failures"""
+        with self._lock:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        if remove:
+            os.remove(self.path)
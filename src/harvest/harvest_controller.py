@@ -1,45 +1,333 @@
-from .harvest_sdk import HarvestSDK
+from .harvest_sdk import HarvestSDK, DEFAULT_POOL_SIZE
+from .fill_journal import FillJournal
+from .reconcile import plan_reconciliation
+from .time_entry_store import TimeEntryStore
 import requests
 import os
+from utils.cache_utils import get_cache_dir
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from dotenv import load_dotenv
 from config.harvest_config import timesheet_entries_for_a_day
 load_dotenv()
 
+# Seconds a GET response is reused within one process before it is revalidated
+DEFAULT_RESPONSE_CACHE_TTL = 60
+
 class HarvestController:
     # constructor
-    def __init__(self):
+    def __init__(self, workers=1, use_store=None, account_id=None, access_token=None, entry_template=None, session=None):
+        """
+        Credentials default to HARVEST_ACCOUNT_ID/HARVEST_ACCESS_TOKEN and the entry template to
+        timesheet_entries_for_a_day; team runs pass their own along with a shared session.
+        """
+        self.workers = max(1, workers)
         self.sdk = HarvestSDK(
-            account_id=os.getenv("HARVEST_ACCOUNT_ID"),
-            access_token=os.getenv("HARVEST_ACCESS_TOKEN")
+            account_id=account_id or os.getenv("HARVEST_ACCOUNT_ID"),
+            access_token=access_token or os.getenv("HARVEST_ACCESS_TOKEN"),
+            pool_size=max(DEFAULT_POOL_SIZE, self.workers),
+            identity_cache_ttl=int(os.getenv("HARVEST_IDENTITY_CACHE_TTL") or 0),
+            session=session,
+            response_cache_ttl=int(os.getenv("HARVEST_RESPONSE_CACHE_TTL") or DEFAULT_RESPONSE_CACHE_TTL)
+        )
+        self.entry_template = timesheet_entries_for_a_day if entry_template is None else entry_template
+        if use_store is None:
+            use_store = os.getenv("HARVEST_LOCAL_STORE", "1") != "0"
+        self.store = TimeEntryStore() if use_store else None
+        # spent_date (YYYY-MM-DD) -> entries, when a day is not filled from the static config
+        self._day_entries = {}
+        self._default_entries = None
+        self.journal = None
+
+    def set_entry_template(self, entries):
+        """Use a new entry template (e.g. after the config changed), resolved again on next use"""
+        self.entry_template = entries
+        self._default_entries = None
+
+    def resolve_entries(self, entries):
+        """Fill in missing project_id/task_id from the project and task names using the project catalog"""
+        return [self.sdk.catalog.resolve_entry(entry) for entry in entries]
+
+    def default_entries(self):
+        """The configured entries with their IDs resolved; raises ValueError for an unknown project or task"""
+        if self._default_entries is None:
+            self._default_entries = self.resolve_entries(self.entry_template)
+        return self._default_entries
+
+    def entries_for_day(self, spent_date):
+        """Entries to log on a day (YYYY-MM-DD): built from the calendar if loaded, otherwise the configured ones"""
+        if spent_date in self._day_entries:
+            return self._day_entries[spent_date]
+        return self.default_entries()
+
+    def target_hours_per_day(self):
+        """Hours a workday should add up to, taken from the configured entries"""
+        return sum(entry.get("hours", 0) for entry in self.entry_template)
+
+    def load_calendar_entries(self, dates):
+        """Build each workday's entries from Google Calendar events using the configured calendar rules"""
+        # Imported here so runs without --from-calendar never load the Google client libraries
+        import config.harvest_config as harvest_config
+        from google_calendar.google_calendar_sdk import GoogleCalendarSDK
+        from .calendar_rules import CalendarRuleEngine
+
+        calendar_config = getattr(harvest_config, "CALENDAR_CONFIG", {})
+        engine = CalendarRuleEngine(
+            self.resolve_entries(getattr(harvest_config, "calendar_rules", [])),
+            self.default_entries(),
+            hours_per_day=calendar_config.get("hours_per_day", 8)
+        )
+        calendar = GoogleCalendarSDK(
+            credentials_file=calendar_config.get("credentials_file", "credentials.json"),
+            token_file=calendar_config.get("token_file", "token.json")
+        )
+        spent_dates = [date.strftime("%Y-%m-%d") for date in dates]
+        if not spent_dates:
+            return
+        print(f"Fetching calendar events from {min(spent_dates)} to {max(spent_dates)}...")
+        events_by_day = calendar.get_events_for_calendars(
+            min(spent_dates), max(spent_dates), calendar_config.get("calendar_ids", ["primary"])
+        )
+        for spent_date in spent_dates:
+            self._day_entries[spent_date] = engine.entries_for_day(events_by_day.get(spent_date, []))
+
+    def iter_entries(self, from_date, to_date, refresh=False):
+        """
+        Yield the time entries between two dates (DD/MM/YYYY).
+        With the local store enabled it is synced first (only changes are downloaded) and read from disk;
+        `refresh` downloads the whole range again to pick up entries deleted outside this tool.
+        """
+        if self.store is None:
+            yield from self.sdk.iter_time_entries(from_date, to_date)
+            return
+        if refresh:
+            received = self.store.sync(self.sdk, from_date, to_date)
+        else:
+            received = self.store.sync(self.sdk)
+        print(f"Synced local store ({received} entries received from Harvest)")
+        yield from self.store.iter_entries(self.sdk.get_user_id(), from_date, to_date)
+
+    def _forget_entries(self, entry_ids):
+        if self.store is not None and entry_ids:
+            self.store.delete(entry_ids)
+
+    def journal_path(self, name):
+        """Path of the journal kept for a fill run named `name`"""
+        return os.path.join(get_cache_dir(), "journals", f"fill-{name}.jsonl")
+
+    def open_journal(self, name, resume=False):
+        """
+        Record the fill run in a journal named after its date range.
+        With `resume` an earlier journal is replayed: days keep their planned entries, entries
+        already created are skipped, and entries whose outcome is unknown are looked up in Harvest.
+        Without `resume` an existing journal (from an interrupted run) raises ValueError and is kept.
+        """
+        path = self.journal_path(name)
+        if resume and not os.path.exists(path):
+            print(f"No interrupted run found for {name}, starting from the beginning")
+        if not resume and os.path.exists(path):
+            raise ValueError(
+                f"An interrupted run over the same dates left a journal at {path}. Use --resume to continue it "
+                "without creating its entries twice, or delete the journal to start over"
+            )
+        self.journal = FillJournal(path, resume=resume)
+        if resume:
+            self._recover_in_doubt_entries()
+
+    def close_journal(self, completed):
+        """Close the journal, keeping it for --resume unless every entry was created"""
+        if self.journal is not None:
+            self.journal.close(remove=completed)
+            self.journal = None
+
+    def _recover_in_doubt_entries(self):
+        in_doubt = self.journal.in_doubt()
+        print(f"Resuming: {len(self.journal.done)} entries already created, {len(in_doubt)} to check or create")
+        if not in_doubt:
+            return
+        # A create may have reached Harvest just before the interruption: look for a matching entry
+        days = sorted({spent_date for spent_date, _, _ in in_doubt})
+        from_date = datetime.strptime(days[0], "%Y-%m-%d").strftime("%d/%m/%Y")
+        to_date = datetime.strptime(days[-1], "%Y-%m-%d").strftime("%d/%m/%Y")
+        claimed = set(self.journal.done.values())
+        candidates = {}
+        for existing in self.sdk.iter_time_entries(from_date, to_date):
+            if existing.id not in claimed:
+                key = (existing.spent_date, existing.project.id, existing.task.id, float(existing.hours), existing.notes or "")
+                candidates.setdefault(key, []).append(existing.id)
+        for spent_date, index, entry in in_doubt:
+            key = (spent_date, int(entry["project_id"]), int(entry["task_id"]), float(entry["hours"]), entry.get("notes") or "")
+            if candidates.get(key):
+                self.journal.mark_done(spent_date, index, candidates[key].pop(0))
+                print(f"{spent_date}: {entry['hours']}h entry for {entry['project_name']} - {entry['task_name']} was created before the interruption")
+
+    def _planned_entries(self, spent_date):
+        entries = self.entries_for_day(spent_date)
+        if self.journal is not None:
+            entries = self.journal.plan_day(spent_date, entries)
+        return entries
+
+    def _is_done(self, spent_date, index):
+        return self.journal is not None and self.journal.is_done(spent_date, index)
+
+    def _create_entry(self, spent_date, entry, index=None):
+        result = self.sdk.create_time_entry(
+            project_id=entry['project_id'],
+            task_id=entry['task_id'],
+            spent_date=spent_date,
+            hours=entry['hours'],
+            notes=entry['notes'],
         )
+        if self.journal is not None and index is not None:
+            self.journal.mark_done(spent_date, index, result["id"])
+        return result
     
     def fill_timesheet(self, date_str):
+        """Fill the timesheet for one day (DD/MM/YYYY). Returns the number of failed entries."""
         # Convert date string to required format (YYYY-MM-DD)
         date_obj = datetime.strptime(date_str, "%d/%m/%Y")
         spent_date = date_obj.strftime("%Y-%m-%d")
 
-        for entry in timesheet_entries_for_a_day:
+        failed = 0
+        for index, entry in enumerate(self._planned_entries(spent_date)):
+            if self._is_done(spent_date, index):
+                print(f"Already created {entry['hours']}h entry for {entry['project_name']} - {entry['task_name']}")
+                continue
             try:
-                self.sdk.create_time_entry(
-                    project_id=entry['project_id'],
-                    task_id=entry['task_id'],
-                    spent_date=spent_date,
-                    hours=entry['hours'],
-                    notes=entry['notes'],
-                )
+                self._create_entry(spent_date, entry, index)
                 print(f"Created {entry['hours']}h entry for {entry['project_name']} - {entry['task_name']}")
             except requests.exceptions.RequestException as e:
+                failed += 1
                 print(f"Error creating time entry: {str(e)}")
-    
-    def delete_time_entries_for_date(self, from_date, to_date):
-        """Delete all time entries for the given date range"""
-        entries = self.sdk.get_time_entries(from_date, to_date)
+        return failed
+
+    def fill_timesheets(self, dates):
+        """
+        Fill the timesheet for several workdays, sending up to `workers` create calls at once.
+        Progress is printed day by day in date order. Returns the number of failed entries.
+        """
+        created = 0
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # Queue every entry up front; the pool bounds how many are in flight
+            days = []
+            for date in dates:
+                spent_date = date.strftime("%Y-%m-%d")
+                entries = self._planned_entries(spent_date)
+                futures = [
+                    None if self._is_done(spent_date, index) else executor.submit(self._create_entry, spent_date, entry, index)
+                    for index, entry in enumerate(entries)
+                ]
+                days.append((date, entries, futures))
+
+            for i, (date, entries, futures) in enumerate(days, 1):
+                print(f"\n[{i}/{len(days)}] Processing {date.strftime('%d/%m/%Y')} ({date.strftime('%A')})...")
+                print("-" * 60)
+                for entry, future in zip(entries, futures):
+                    if future is None:
+                        print(f"Already created {entry['hours']}h entry for {entry['project_name']} - {entry['task_name']}")
+                        continue
+                    try:
+                        future.result()
+                        created += 1
+                        print(f"Created {entry['hours']}h entry for {entry['project_name']} - {entry['task_name']}")
+                    except requests.exceptions.RequestException as e:
+                        failed += 1
+                        print(f"Error creating time entry for {entry['project_name']} - {entry['task_name']}: {str(e)}")
+                print("-" * 60)
+
+        print(f"\nCreated {created} time entries, {failed} failed")
+        return failed
+
+    def _apply_operation(self, operation):
+        if operation["action"] == "create":
+            return self._create_entry(operation["spent_date"], operation["entry"])
+        if operation["action"] == "update":
+            entry = operation["entry"]
+            return self.sdk.update_time_entry(operation["existing"].id, hours=entry["hours"], notes=entry["notes"])
+        response = self.sdk.delete_time_entry(operation["existing"].id)
+        response.raise_for_status()
+        return response
 
-        for entry in entries:
-            entry_id = entry["id"]
+    def _describe_operation(self, operation):
+        if operation["action"] == "delete":
+            existing = operation["existing"]
+            return f"{existing.hours}h entry {existing.id} for {existing.project.name} - {existing.task.name}"
+        entry = operation["entry"]
+        return f"{entry['hours']}h entry for {entry['project_name']} - {entry['task_name']}"
+
+    def reconcile_timesheets(self, dates):
+        """
+        Make the timesheet for the given workdays match the configured entries with as few writes as possible.
+        Existing entries are fetched with one range query and only the difference is sent.
+        Returns the number of failed operations.
+        """
+        if not dates:
+            print("No workdays to reconcile")
+            return 0
+        from_date = min(dates).strftime("%d/%m/%Y")
+        to_date = max(dates).strftime("%d/%m/%Y")
+        print(f"Fetching existing time entries from {from_date} to {to_date}...")
+        # Always download the range: the store cannot see entries deleted in Harvest, and the
+        # plan would then skip re-creating them
+        existing_entries = self.iter_entries(from_date, to_date, refresh=True)
+        spent_dates = [date.strftime("%Y-%m-%d") for date in dates]
+        operations = plan_reconciliation(existing_entries, spent_dates, self.entries_for_day)
+
+        counts = {action: sum(1 for op in operations if op["action"] == action) for action in ("create", "update", "delete")}
+        print(f"Plan: {counts['create']} to create, {counts['update']} to update, {counts['delete']} to delete")
+        if not operations:
+            print("Timesheet already up to date")
+            return 0
+
+        failed = 0
+        deleted_ids = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = [executor.submit(self._apply_operation, operation) for operation in operations]
+            for operation, future in zip(operations, futures):
+                description = self._describe_operation(operation)
+                try:
+                    future.result()
+                    if operation["action"] == "delete":
+                        deleted_ids.append(operation["existing"].id)
+                    print(f"{operation['spent_date']}: {operation['action'].capitalize()}d {description}")
+                except requests.exceptions.RequestException as e:
+                    failed += 1
+                    print(f"{operation['spent_date']}: Error trying to {operation['action']} {description}: {str(e)}")
+
+        self._forget_entries(deleted_ids)
+        print(f"\nApplied {len(operations) - failed} changes, {failed} failed")
+        return failed
+
+    def _delete_entry(self, entry_id):
+        try:
             del_response = self.sdk.delete_time_entry(entry_id)
-            if del_response.status_code in (200, 204):
-                print(f"Deleted time entry {entry_id} for {from_date} to {to_date}")
-            else:
-                print(f"Failed to delete entry {entry_id}: {del_response.text}")
+        except requests.exceptions.RequestException as e:
+            return None, str(e)
+        return del_response.status_code, del_response.text
+    
+    def delete_time_entries_for_date(self, from_date, to_date, refresh=False):
+        """Delete all time entries for the given date range. Returns the number of failed deletes."""
+        # Only keep the IDs: deleting while still paging would shift later pages and skip entries
+        entry_ids = [entry.id for entry in self.iter_entries(from_date, to_date, refresh=refresh)]
+
+        failed = 0
+        deleted_ids = []
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # map() yields results in submission order, keeping the output stable
+            for entry_id, (status_code, message) in zip(entry_ids, executor.map(self._delete_entry, entry_ids)):
+                if status_code in (200, 204):
+                    deleted_ids.append(entry_id)
+                    print(f"Deleted time entry {entry_id} for {from_date} to {to_date}")
+                elif status_code == 404:
+                    # Deleted outside this tool after the local store last saw it
+                    deleted_ids.append(entry_id)
+                    print(f"Time entry {entry_id} was already deleted")
+                else:
+                    failed += 1
+                    print(f"Failed to delete entry {entry_id}: {message}")
+
+        self._forget_entries(deleted_ids)
+        if failed:
+            print(f"{failed} of {len(entry_ids)} time entries could not be deleted")
+        return failed
@@ -1,80 +1,215 @@
 import requests
+import hashlib
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from .models import Project, Task, TimeEntry
+from .project_catalog import ProjectCatalog
+from .rate_limiter import RateLimiter
+from .response_cache import ResponseCache
+from utils.cache_utils import get_cache_dir, read_json, write_json_atomic
+
+DEFAULT_POOL_SIZE = 10
+DEFAULT_TIMEOUT = (5, 30)  # (connect, read) seconds
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_MAX_RATE_LIMIT_RETRIES = 10
+DEFAULT_PER_PAGE = 2000  # Harvest's maximum page size
+
+
+def create_session(pool_size=DEFAULT_POOL_SIZE, max_retries=DEFAULT_MAX_RETRIES):
+    """
+    Create a keep-alive session with a connection pool and retries on transient failures.
+    It carries no credentials, so several HarvestSDK instances can share it.
+    """
+    # Only idempotent methods are retried on 5xx responses so a POST is never sent twice.
+    # Connection errors are retried for every method as the request never reached the server.
+    retry = Retry(
+        total=max_retries,
+        backoff_factor=0.5,
+        status_forcelist=(500, 502, 503, 504),
+        raise_on_status=False
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
 
 class HarvestSDK:
-    def __init__(self, account_id, access_token):
+    def __init__(self, account_id, access_token, pool_size=DEFAULT_POOL_SIZE,
+                 timeout=DEFAULT_TIMEOUT, max_retries=DEFAULT_MAX_RETRIES,
+                 rate_limiter=None, max_rate_limit_retries=DEFAULT_MAX_RATE_LIMIT_RETRIES,
+                 identity_cache_ttl=0, session=None, response_cache_ttl=0):
         self.base_url = os.getenv("HARVEST_BASE_URL")
+        self.account_id = account_id
+        # Cache key for this account/token pair without storing the token itself
+        token_fingerprint = hashlib.sha256((access_token or "").encode()).hexdigest()[:16]
+        self.identity_cache_key = f"{account_id}:{token_fingerprint}"
+        self.identity_cache_ttl = identity_cache_ttl
+        self._user = None
+        self._user_lock = threading.Lock()
+        self._catalog = None
+        self.hooks = []
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter or RateLimiter()
+        self.max_rate_limit_retries = max_rate_limit_retries
         self.headers = {
             "Harvest-Account-ID": account_id,
             "Authorization": f"Bearer {access_token}",
             "Content-Type": "application/json",
             "User-Agent": "Python Harvest API Client"
         }
+        # A session passed in is shared with other SDK instances (team runs) and closed by its owner
+        self._owns_session = session is None
+        self.session = session or create_session(pool_size, max_retries)
+        # GET responses reused for `response_cache_ttl` seconds, then revalidated when possible
+        self.response_cache = ResponseCache(self.base_url, response_cache_ttl) if response_cache_ttl > 0 else None
+
+    def _request(self, method, path, **kwargs):
+        """Send a request to the Harvest API through the shared session and rate limiter"""
+        kwargs.setdefault("timeout", self.timeout)
+        # Credentials go on each request rather than the session, which may be shared
+        kwargs.setdefault("headers", self.headers)
+        # Pagination links from Harvest are already absolute URLs
+        url = path if path.startswith(("http://", "https://")) else f"{self.base_url}{path}"
+        if self.response_cache is None:
+            return self._send_with_retries(method, url, path, **kwargs)
+        if method == "GET":
+            return self._cached_get(url, path, **kwargs)
+        try:
+            return self._send_with_retries(method, url, path, **kwargs)
+        finally:
+            # Even a failed write (or one that timed out after Harvest processed it) may have
+            # changed the resource, so cached reads of it are dropped
+            self.response_cache.invalidate(url)
+
+    def _cached_get(self, url, path, **kwargs):
+        """GET through the response cache: fresh responses are reused, stale ones revalidated"""
+        key = self.response_cache.key(url, kwargs.get("params"))
+        cached, fresh = self.response_cache.lookup(key)
+        if fresh:
+            return cached.to_response()
+        if cached is not None:
+            kwargs["headers"] = {**kwargs["headers"], **cached.validators()}
+        generation = self.response_cache.generation(url)
+        response = self._send_with_retries("GET", url, path, **kwargs)
+        if response.status_code == 304 and cached is not None:
+            self.response_cache.revalidate(cached)
+            return cached.to_response()
+        if response.status_code == 200:
+            self.response_cache.store(key, url, response, generation)
+        return response
+
+    def _send_with_retries(self, method, url, path, **kwargs):
+        """Send a request, waiting and resending while Harvest answers 429"""
+        for attempt in range(self.max_rate_limit_retries + 1):
+            self.rate_limiter.acquire()
+            response = self._send(method, url, **kwargs) if self.hooks else self.session.request(method, url, **kwargs)
+            # A 429 means the request was not processed, so it is safe to resend writes too
+            wait = self.rate_limiter.observe(response)
+            if wait is None or attempt == self.max_rate_limit_retries:
+                return response
+            for hook in self.hooks:
+                hook.on_rate_limited(method, url, wait)
+            print(f"Rate limited by Harvest, retrying {method} {path} in {wait:.1f}s")
+        return response
+
+    def _send(self, method, url, **kwargs):
+        """Send one request and report it to the hooks (only used when hooks are registered)"""
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except requests.exceptions.RequestException as e:
+            elapsed = time.perf_counter() - start
+            for hook in self.hooks:
+                hook.on_error(method, url, e, elapsed)
+            raise
+        elapsed = time.perf_counter() - start
+        retry_state = getattr(response.raw, "retries", None)
+        retries = len(retry_state.history) if retry_state is not None else 0
+        for hook in self.hooks:
+            hook.on_response(method, url, response, elapsed, retries)
+        return response
+
+    def add_hook(self, hook):
+        """Register a RequestHook (see harvest.instrumentation) called for every HTTP attempt"""
+        self.hooks.append(hook)
+
+    def close(self):
+        """Close all pooled connections, unless the session is shared"""
+        if self._owns_session:
+            self.session.close()
     
+    def _identity_cache_file(self):
+        return os.path.join(get_cache_dir(), "identity.json")
+
+    def _load_cached_user(self):
+        if self.identity_cache_ttl <= 0:
+            return None
+        cached = read_json(self._identity_cache_file(), {}).get(self.identity_cache_key)
+        if cached and time.time() - cached["fetched_at"] < self.identity_cache_ttl:
+            return cached["user"]
+        return None
+
+    def _store_cached_user(self, user):
+        if self.identity_cache_ttl <= 0:
+            return
+        path = self._identity_cache_file()
+        cache = read_json(path, {})
+        now = time.time()
+        # Drop expired identities while we are rewriting the file anyway
+        cache = {key: value for key, value in cache.items() if now - value["fetched_at"] < self.identity_cache_ttl}
+        cache[self.identity_cache_key] = {"fetched_at": now, "user": user}
+        write_json_atomic(path, cache)
+
+    def get_user(self):
+        """Get the current user, fetched once per SDK instance (and per identity cache TTL when enabled)"""
+        with self._user_lock:
+            if self._user is None:
+                user = self._load_cached_user()
+                if user is None:
+                    response = self._request("GET", "/users/me.json")
+                    response.raise_for_status()
+                    data = response.json()
+                    user = {"id": data["id"], "first_name": data.get("first_name"), "last_name": data.get("last_name")}
+                    self._store_cached_user(user)
+                self._user = user
+            return self._user
+
     def get_user_id(self):
         """Get the current user's ID"""
-        response = requests.get(f"{self.base_url}/users/me.json", headers=self.headers)
-        response.raise_for_status()
-        return response.json()["id"]
+        return self.get_user()["id"]
     
+    @property
+    def catalog(self):
+        """Cached catalog of the user's project and task assignments"""
+        if self._catalog is None:
+            self._catalog = ProjectCatalog(self)
+        return self._catalog
+
     def get_project_tasks(self):
-        """Get all projects and their associated tasks through time entries"""
+        """Get all assigned projects and their tasks from the locally cached project assignments, as {Project: [Task]}"""
         try:
-            print("Fetching assigned projects through time entries...")
-            # Get recent time entries to find your assigned projects
-            response = requests.get(
-                f"{self.base_url}/time_entries.json",
-                headers=self.headers,
-                params={
-                    "user_id": self.get_user_id(),
-                    "per_page": 100  # Get more entries to ensure we catch all projects
-                }
-            )
-            print(f"Response status: {response.status_code}")
-            
-            if response.status_code == 200:
-                entries = response.json()["time_entries"]
-                
-                # Extract unique projects and their tasks
-                projects = {}
-                for entry in entries:
-                    project = entry["project"]
-                    project_id = project["id"]
-                    
-                    if project_id not in projects:
-                        projects[project_id] = {
-                            "id": project_id,
-                            "name": project["name"],
-                            "tasks": {}
-                        }
-                    
-                    task = entry["task"]
-                    task_id = task["id"]
-                    if task_id not in projects[project_id]["tasks"]:
-                        projects[project_id]["tasks"][task_id] = {
-                            "id": task_id,
-                            "name": task["name"]
-                        }
-                
-                # Convert to list format matching original API
-                project_list = []
-                for project in projects.values():
-                    project_list.append({
-                        "id": project["id"],
-                        "name": project["name"],
-                        "tasks": list(project["tasks"].values())
-                    })
-                
-                print(f"Found {len(project_list)} projects from your time entries")
-                return project_list
-            else:
-                response.raise_for_status()
-            
+            print("Fetching assigned projects...")
+            project_tasks = {
+                Project.get(project["id"], project["name"]): [Task.get(task["id"], task["name"]) for task in project["tasks"]]
+                for project in self.catalog.projects()
+            }
+            print(f"Found {len(project_tasks)} assigned projects")
+            return project_tasks
         except requests.exceptions.RequestException as e:
             print(f"Error in get_project_tasks: {str(e)}")
             raise
 
+    def iter_project_assignments(self, per_page=DEFAULT_PER_PAGE, **params):
+        """Yield the current user's project assignments (with task assignments) across all pages"""
+        yield from self._iter_paginated("/users/me/project_assignments", "project_assignments", {"per_page": per_page, **params})
+
     def create_time_entry(self, project_id, task_id, spent_date, hours, notes=None):
         """Create a time entry"""
         payload = {
@@ -85,32 +220,52 @@ class HarvestSDK:
             "notes": notes
         }
         
-        response = requests.post(
-            f"{self.base_url}/time_entries.json",
-            headers=self.headers,
-            json=payload
-        )
+        response = self._request("POST", "/time_entries.json", json=payload)
         response.raise_for_status()
         return response.json()
 
-    def get_time_entries(self, from_date, to_date):
-        """Fetch all time entries for the given date (DD/MM/YYYY) for the current user."""
-        from_date = datetime.strptime(from_date, "%d/%m/%Y").strftime("%Y-%m-%d")
-        to_date = datetime.strptime(to_date, "%d/%m/%Y").strftime("%Y-%m-%d")
-        user_id = self.get_user_id()
-
-        response = requests.get(
-            f"{self.base_url}/time_entries",
-            headers=self.headers,
-            params={"from": from_date, "to": to_date, "user_id": user_id}
-        )
+    def update_time_entry(self, entry_id, **fields):
+        """Update fields (hours, notes, project_id, task_id, ...) of a time entry"""
+        response = self._request("PATCH", f"/time_entries/{entry_id}", json=fields)
         response.raise_for_status()
-        return response.json().get("time_entries", [])
+        return response.json()
+
+    def _get_page(self, path, params=None):
+        response = self._request("GET", path, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    def _iter_paginated(self, path, key, params):
+        """Yield the `key` records of every page, prefetching the next page in the background"""
+        with ThreadPoolExecutor(max_workers=1) as prefetcher:
+            future = prefetcher.submit(self._get_page, path, params)
+            while future is not None:
+                page = future.result()
+                # The next link already carries all query parameters
+                next_url = (page.get("links") or {}).get("next")
+                future = prefetcher.submit(self._get_page, next_url) if next_url else None
+                yield from page.get(key, [])
+
+    def iter_time_entries(self, from_date=None, to_date=None, per_page=DEFAULT_PER_PAGE, **params):
+        """
+        Yield the current user's time entries between the given dates (DD/MM/YYYY) across all pages.
+        The next page is fetched in the background while the current one is being consumed.
+        Extra keyword arguments are passed to Harvest as query parameters (e.g. updated_since).
+        """
+        params = {"user_id": self.get_user_id(), "per_page": per_page, **params}
+        if from_date:
+            params["from"] = datetime.strptime(from_date, "%d/%m/%Y").strftime("%Y-%m-%d")
+        if to_date:
+            params["to"] = datetime.strptime(to_date, "%d/%m/%Y").strftime("%Y-%m-%d")
+
+        for data in self._iter_paginated("/time_entries", "time_entries", params):
+            yield TimeEntry.from_api(data)
+
+    def get_time_entries(self, from_date, to_date, per_page=DEFAULT_PER_PAGE):
+        """Fetch all time entries for the given date (DD/MM/YYYY) for the current user."""
+        return list(self.iter_time_entries(from_date, to_date, per_page=per_page))
 
     def delete_time_entry(self, entry_id):
         """Delete a single time entry by ID."""
-        response = requests.delete(
-            f"{self.base_url}/time_entries/{entry_id}",
-            headers=self.headers
-        )
+        response = self._request("DELETE", f"/time_entries/{entry_id}")
         return response
@@ -0,0 +1,180 @@
+import json
+import re
+import threading
+from bisect import bisect_left
+from urllib.parse import urlparse
+
+# Upper bounds (seconds) of the latency histogram buckets, Prometheus style
+LATENCY_BUCKETS = (0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+RATE_LIMIT_REMAINING_HEADERS = ("X-RateLimit-Remaining", "RateLimit-Remaining")
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_name(method, url):
+    """Group requests by endpoint: "GET /time_entries/{id}" for any entry ID, without query or .json suffix"""
+    path = urlparse(url).path
+    if "/v2/" in path:
+        path = path[path.index("/v2/") + len("/v2"):]
+    if path.endswith(".json"):
+        path = path[:-len(".json")]
+    return f"{method} {_ID_SEGMENT.sub('/{id}', path)}"
+
+
+class RequestHook:
+    """Base class for HarvestSDK hooks, called after every HTTP attempt."""
+
+    def on_response(self, method, url, response, elapsed, retries):
+        """A response was received. `retries` counts transport retries done by urllib3."""
+
+    def on_error(self, method, url, error, elapsed):
+        """The request failed without a response (connection error, timeout, ...)."""
+
+    def on_rate_limited(self, method, url, wait):
+        """A 429 was received and the request will be resent after `wait` seconds."""
+
+
+class EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.latency_sum = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)  # last bucket is +Inf
+        self.statuses = {}
+        self.errors = 0
+        self.rate_limited = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "latency_seconds_sum": round(self.latency_sum, 6),
+            "latency_buckets": {str(bound): count for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), self.buckets)},
+            "status_codes": {str(status): count for status, count in sorted(self.statuses.items())},
+            "errors": self.errors,
+            "rate_limited": self.rate_limited,
+            "retries": self.retries,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+        }
+
+
+class RequestMetrics(RequestHook):
+    """
+    Collects per-endpoint latency histograms, status codes, errors, 429s, retries and bytes
+    transferred, plus the lowest rate-limit headroom reported by the server.
+    """
+
+    def __init__(self):
+        self.endpoints = {}
+        self.min_rate_limit_remaining = None
+        self.rate_limit_wait_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def _stats(self, method, url):
+        name = endpoint_name(method, url)
+        stats = self.endpoints.get(name)
+        if stats is None:
+            stats = self.endpoints[name] = EndpointStats()
+        return stats
+
+    def _record_latency(self, stats, elapsed):
+        stats.count += 1
+        stats.latency_sum += elapsed
+        stats.buckets[bisect_left(LATENCY_BUCKETS, elapsed)] += 1
+
+    def on_response(self, method, url, response, elapsed, retries):
+        request_body = response.request.body if response.request is not None else None
+        remaining = next((response.headers[name] for name in RATE_LIMIT_REMAINING_HEADERS if name in response.headers), None)
+        with self._lock:
+            stats = self._stats(method, url)
+            self._record_latency(stats, elapsed)
+            stats.statuses[response.status_code] = stats.statuses.get(response.status_code, 0) + 1
+            if response.status_code >= 400:
+                stats.errors += 1
+            if response.status_code == 429:
+                stats.rate_limited += 1
+            stats.retries += retries
+            stats.bytes_sent += len(request_body) if request_body else 0
+            stats.bytes_received += len(response.content)
+            if remaining is not None and remaining.isdigit():
+                if self.min_rate_limit_remaining is None or int(remaining) < self.min_rate_limit_remaining:
+                    self.min_rate_limit_remaining = int(remaining)
+
+    def on_error(self, method, url, error, elapsed):
+        with self._lock:
+            stats = self._stats(method, url)
+            self._record_latency(stats, elapsed)
+            stats.errors += 1
+
+    def on_rate_limited(self, method, url, wait):
+        with self._lock:
+            self._stats(method, url).retries += 1
+            self.rate_limit_wait_seconds += wait
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "endpoints": {name: stats.to_dict() for name, stats in sorted(self.endpoints.items())},
+                "min_rate_limit_remaining": self.min_rate_limit_remaining,
+                "rate_limit_wait_seconds": round(self.rate_limit_wait_seconds, 3),
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_prometheus(self):
+        """Render the metrics in the Prometheus text exposition format"""
+        lines = [
+            "# HELP harvest_request_duration_seconds Harvest API request latency.",
+            "# TYPE harvest_request_duration_seconds histogram",
+        ]
+        with self._lock:
+            endpoints = sorted(self.endpoints.items())
+            for name, stats in endpoints:
+                method, path = name.split(" ", 1)
+                labels = f'method="{method}",endpoint="{path}"'
+                cumulative = 0
+                for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), stats.buckets):
+                    cumulative += count
+                    lines.append(f'harvest_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f"harvest_request_duration_seconds_sum{{{labels}}} {stats.latency_sum:.6f}")
+                lines.append(f"harvest_request_duration_seconds_count{{{labels}}} {stats.count}")
+
+            counters = (
+                ("harvest_responses_total", "Responses by status code."),
+                ("harvest_request_errors_total", "Failed requests and error responses."),
+                ("harvest_rate_limited_total", "Responses with status 429."),
+                ("harvest_request_retries_total", "Transport and rate-limit retries."),
+                ("harvest_bytes_sent_total", "Request body bytes sent."),
+                ("harvest_bytes_received_total", "Response body bytes received."),
+            )
+            for metric, help_text in counters:
+                lines.append(f"# HELP {metric} {help_text}")
+                lines.append(f"# TYPE {metric} counter")
+                for name, stats in endpoints:
+                    method, path = name.split(" ", 1)
+                    labels = f'method="{method}",endpoint="{path}"'
+                    if metric == "harvest_responses_total":
+                        for status, count in sorted(stats.statuses.items()):
+                            lines.append(f'{metric}{{{labels},status="{status}"}} {count}')
+                        continue
+                    value = {
+                        "harvest_request_errors_total": stats.errors,
+                        "harvest_rate_limited_total": stats.rate_limited,
+                        "harvest_request_retries_total": stats.retries,
+                        "harvest_bytes_sent_total": stats.bytes_sent,
+                        "harvest_bytes_received_total": stats.bytes_received,
+                    }[metric]
+                    lines.append(f"{metric}{{{labels}}} {value}")
+
+            lines.append("# HELP harvest_rate_limit_wait_seconds_total Time spent waiting after 429 responses.")
+            lines.append("# TYPE harvest_rate_limit_wait_seconds_total counter")
+            lines.append(f"harvest_rate_limit_wait_seconds_total {self.rate_limit_wait_seconds:.3f}")
+            if self.min_rate_limit_remaining is not None:
+                lines.append("# HELP harvest_rate_limit_remaining_min Lowest remaining request count reported by Harvest.")
+                lines.append("# TYPE harvest_rate_limit_remaining_min gauge")
+                lines.append(f"harvest_rate_limit_remaining_min {self.min_rate_limit_remaining}")
+        return "\n".join(lines) + "\n"
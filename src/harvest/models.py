@@ -0,0 +1,97 @@
+import sys
+import threading
+
+
+class _SharedRecord:
+    """An (id, name) record created once per distinct value through get() and shared afterwards"""
+
+    __slots__ = ("id", "name")
+
+    def __init__(self, record_id, name):
+        self.id = record_id
+        self.name = name
+
+    @classmethod
+    def get(cls, record_id, name):
+        key = (record_id, name)
+        instance = cls._instances.get(key)
+        if instance is None:
+            with cls._lock:
+                instance = cls._instances.get(key)
+                if instance is None:
+                    instance = cls._instances[key] = cls(record_id, sys.intern(name) if name else name)
+        return instance
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.id!r}, {self.name!r})"
+
+
+class Project(_SharedRecord):
+    """A Harvest project"""
+
+    __slots__ = ()
+    _instances = {}
+    _lock = threading.Lock()
+
+
+class Task(_SharedRecord):
+    """A Harvest task"""
+
+    __slots__ = ()
+    _instances = {}
+    _lock = threading.Lock()
+
+
+class TimeEntry:
+    """
+    The fields of a Harvest time entry this tool uses. Everything else in the API response
+    (client, invoice, user details, timestamps...) is dropped while parsing, and projects, tasks,
+    dates and user names are shared between entries instead of copied.
+    """
+
+    __slots__ = ("id", "spent_date", "project", "task", "hours", "notes", "updated_at", "user_name")
+
+    def __init__(self, entry_id, spent_date, project, task, hours, notes=None, updated_at=None, user_name=None):
+        self.id = entry_id
+        self.spent_date = spent_date
+        self.project = project
+        self.task = task
+        self.hours = hours
+        self.notes = notes
+        self.updated_at = updated_at
+        self.user_name = user_name
+
+    @classmethod
+    def from_api(cls, data):
+        """Build an entry from a time entry object returned by the Harvest API"""
+        project = data["project"]
+        task = data["task"]
+        user = data.get("user")
+        return cls(
+            data["id"],
+            sys.intern(data["spent_date"]),
+            Project.get(project["id"], project["name"]),
+            Task.get(task["id"], task["name"]),
+            data["hours"],
+            data.get("notes"),
+            data.get("updated_at"),
+            sys.intern(user["name"]) if user and user.get("name") else None,
+        )
+
+    def to_dict(self):
+        """The entry in the shape of a Harvest API time entry (only the parsed fields)"""
+        data = {
+            "id": self.id,
+            "spent_date": self.spent_date,
+            "project": {"id": self.project.id, "name": self.project.name},
+            "task": {"id": self.task.id, "name": self.task.name},
+            "hours": self.hours,
+            "notes": self.notes,
+            "updated_at": self.updated_at,
+        }
+        if self.user_name is not None:
+            data["user"] = {"name": self.user_name}
+        return data
+
+    def __repr__(self):
+        return f"TimeEntry({self.id!r}, {self.spent_date!r}, {self.project.name!r}, {self.task.name!r}, {self.hours!r})"
@@ -0,0 +1,161 @@
+import hashlib
+import os
+import time
+from utils.cache_utils import get_cache_dir, read_json, write_json_atomic
+
+DEFAULT_MAX_AGE_DAYS = 7
+DEFAULT_REVALIDATE_HOURS = 12
+
+
+class ProjectCatalog:
+    """
+    Local catalog of the projects and tasks the current user is assigned to.
+
+    Built from /users/me/project_assignments and stored on disk. The stored copy is used as is for
+    `revalidate_hours`, after which only assignments changed since the last sync are requested
+    (`updated_since`). A full download happens after `max_age_days` to drop assignments that
+    were deleted outright. Lookups by ID and by (case-insensitive) name are dictionary lookups;
+    a lookup that misses triggers one sync in case the assignment is new.
+    """
+
+    def __init__(self, sdk, path=None, max_age_days=DEFAULT_MAX_AGE_DAYS, revalidate_hours=DEFAULT_REVALIDATE_HOURS):
+        self.sdk = sdk
+        key = hashlib.sha256(sdk.identity_cache_key.encode()).hexdigest()[:16]
+        self.path = path or os.path.join(get_cache_dir(), f"catalog-{key}.json")
+        self.max_age = max_age_days * 24 * 3600
+        self.revalidate_after = revalidate_hours * 3600
+        self.state = None
+        self.synced = False
+        self.projects_by_id = {}
+        self.projects_by_name = {}
+
+    def _index(self):
+        self.projects_by_id = {}
+        self.projects_by_name = {}
+        for project in self.state["projects"].values():
+            # JSON object keys are strings, index tasks by int ID as well as by name
+            project["tasks_by_id"] = {int(task_id): name for task_id, name in project["tasks"].items()}
+            project["tasks_by_name"] = {}
+            for task_id, name in project["tasks_by_id"].items():
+                project["tasks_by_name"].setdefault(name.lower(), []).append(task_id)
+            self.projects_by_id[project["id"]] = project
+            self.projects_by_name.setdefault(project["name"].lower(), []).append(project)
+
+    def _save(self):
+        projects = {
+            str(project_id): {"id": project["id"], "name": project["name"], "client": project.get("client"), "tasks": project["tasks"]}
+            for project_id, project in self.state["projects"].items()
+        }
+        write_json_atomic(self.path, {**self.state, "projects": projects})
+
+    def _apply(self, assignment):
+        project = assignment["project"]
+        project_key = str(project["id"])
+        if not assignment.get("is_active", True):
+            self.state["projects"].pop(project_key, None)
+            return
+        self.state["projects"][project_key] = {
+            "id": project["id"],
+            "name": project["name"],
+            "client": (assignment.get("client") or {}).get("name"),
+            "tasks": {
+                str(task_assignment["task"]["id"]): task_assignment["task"]["name"]
+                for task_assignment in assignment.get("task_assignments", [])
+                if task_assignment.get("is_active", True)
+            },
+        }
+
+    def sync(self, full=False):
+        """Bring the catalog up to date. Returns the number of assignments received."""
+        if self.state is None:
+            self.state = read_json(self.path)
+        now = time.time()
+        if full or not self.state or now - self.state["full_sync_at"] > self.max_age:
+            self.state = {"full_sync_at": now, "synced_at": now, "updated_since": None, "projects": {}}
+            params = {}
+        else:
+            params = {"updated_since": self.state["updated_since"]} if self.state["updated_since"] else {}
+
+        received = 0
+        newest = self.state["updated_since"]
+        for assignment in self.sdk.iter_project_assignments(**params):
+            received += 1
+            self._apply(assignment)
+            updated_at = assignment.get("updated_at")
+            if updated_at and (newest is None or updated_at > newest):
+                newest = updated_at
+        self.state["updated_since"] = newest
+        self.state["synced_at"] = now
+        self._save()
+        self._index()
+        self.synced = True
+        return received
+
+    def _ensure_loaded(self):
+        if self.state is None:
+            self.state = read_json(self.path)
+            if self.state and time.time() - self.state["synced_at"] < self.revalidate_after:
+                self._index()
+            else:
+                self.sync()
+
+    def _lookup(self, func, *args):
+        self._ensure_loaded()
+        try:
+            return func(*args)
+        except ValueError:
+            if self.synced:
+                raise
+            # The assignment may be newer than the stored catalog
+            self.sync()
+            return func(*args)
+
+    def get_project(self, project):
+        """Find a project by ID or name"""
+        return self._lookup(self._find_project, project)
+
+    def _find_project(self, project):
+        if isinstance(project, int):
+            found = self.projects_by_id.get(project)
+            if found is None:
+                raise ValueError(f"No project assignment with ID {project}")
+            return found
+        matches = self.projects_by_name.get(project.lower(), [])
+        if not matches:
+            raise ValueError(f"No assigned project named '{project}'")
+        if len(matches) > 1:
+            clients = ", ".join(str(match["client"]) for match in matches)
+            raise ValueError(f"Project name '{project}' is ambiguous (clients: {clients}), use project_id instead")
+        return matches[0]
+
+    def get_task_id(self, project, task):
+        """Find a task ID by name within a project (task IDs are returned unchanged after validation)"""
+        return self._lookup(self._find_task_id, project, task)
+
+    def _find_task_id(self, project, task):
+        project = self._find_project(project)
+        if isinstance(task, int):
+            if task not in project["tasks_by_id"]:
+                raise ValueError(f"Task {task} is not assigned on project '{project['name']}'")
+            return task
+        matches = project["tasks_by_name"].get(task.lower(), [])
+        if len(matches) != 1:
+            raise ValueError(f"No single task named '{task}' on project '{project['name']}'")
+        return matches[0]
+
+    def resolve_entry(self, entry):
+        """Fill in project_id/task_id from project_name/task_name when the IDs are not configured"""
+        if "project_id" in entry and "task_id" in entry:
+            return entry
+        project = self.get_project(entry.get("project_id", entry["project_name"]))
+        task_id = self.get_task_id(project["id"], entry.get("task_id", entry["task_name"]))
+        return {**entry, "project_id": project["id"], "task_id": task_id}
+
+    def projects(self):
+        """All assigned projects with their tasks, as [{id, name, tasks: [{id, name}]}]"""
+        self._ensure_loaded()
+        return [
+            {"id": project["id"], "name": project["name"],
+             "tasks": [{"id": task_id, "name": name} for task_id, name in project["tasks_by_id"].items()]}
+            for project in self.projects_by_id.values()
+        ]
@@ -0,0 +1,152 @@
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Harvest allows 100 requests per 15 seconds for each access token
+DEFAULT_MAX_REQUESTS = 100
+DEFAULT_PERIOD = 15.0
+
+LIMIT_HEADERS = ("X-RateLimit-Limit", "RateLimit-Limit")
+REMAINING_HEADERS = ("X-RateLimit-Remaining", "RateLimit-Remaining")
+RESET_HEADERS = ("X-RateLimit-Reset", "RateLimit-Reset")
+# Reset values above this are Unix timestamps (2001 onwards), not delays in seconds
+EPOCH_THRESHOLD = 1_000_000_000
+
+
+def _header(response, names):
+    for name in names:
+        value = response.headers.get(name)
+        if value is not None:
+            return value
+    return None
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (seconds or HTTP date) into a number of seconds to wait"""
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+def _reset_delay(value):
+    """Seconds until a rate-limit window resets, from a delay or an epoch timestamp"""
+    delay = parse_retry_after(value)
+    # Some servers send the reset as an epoch timestamp rather than a delay
+    if delay is not None and delay > EPOCH_THRESHOLD:
+        delay = max(0.0, delay - time.time())
+    return delay
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket that every HarvestSDK request passes through.
+
+    The bucket starts at the documented Harvest limit and adapts while running: a 429 halves
+    the rate (once per pause) and pauses all callers for the Retry-After period, each successful response
+    raises it again a little, and rate-limit headers sent by the server override the local
+    estimate of what is left in the current window. A limit advertised by the server replaces
+    the configured one, with the window length taken from the longest reset delay seen.
+    """
+
+    def __init__(self, max_requests=DEFAULT_MAX_REQUESTS, period=DEFAULT_PERIOD, burst=None):
+        self.max_requests = max_requests
+        self.period = period
+        self.capacity = burst if burst is not None else max(1, max_requests // 10)
+        # A bucket allows `capacity + rate * period` requests per window, keep that within the limit
+        self.max_rate = max(1, max_requests - self.capacity) / period
+        self.min_rate = self.max_rate / 16
+        self.rate = self.max_rate
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+        self._observed_period = None
+
+    def _learn_limit(self, max_requests, period):
+        """Switch to a limit advertised by the server, shrinking the burst to fit it"""
+        self.max_requests = max_requests
+        self.period = period
+        self.capacity = min(self.capacity, max(1, max_requests // 10))
+        self.tokens = min(self.tokens, float(self.capacity))
+        self.max_rate = max(1, max_requests - self.capacity) / period
+        self.min_rate = self.max_rate / 16
+        self.rate = min(self.rate, self.max_rate)
+
+    def _refill(self, now):
+        # `updated` lies in the future while callers are paused by a 429
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def acquire(self):
+        """Take one token, sleeping until the request is allowed to go out"""
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.tokens -= 1
+            # Each caller reserves its slot so concurrent callers queue up instead of bursting
+            wait = max(0.0, self.updated - now)
+            if self.tokens < 0:
+                wait += -self.tokens / self.rate
+        while wait > 0:
+            time.sleep(wait)
+            # A pause that started while this caller slept holds it back too
+            with self.lock:
+                wait = self.updated - time.monotonic()
+
+    def pause(self, seconds):
+        """Stop all callers for the given number of seconds"""
+        with self.lock:
+            self._pause(time.monotonic(), seconds)
+
+    def _pause(self, now, seconds):
+        self._refill(now)
+        self.updated = max(self.updated, now + seconds)
+        self.tokens = min(self.tokens, 0.0)
+
+    def observe(self, response):
+        """Adapt the bucket to a response. Returns the seconds to wait before retrying a 429, otherwise None"""
+        limit = _header(response, LIMIT_HEADERS)
+        remaining = _header(response, REMAINING_HEADERS)
+        reset_delay = _reset_delay(_header(response, RESET_HEADERS))
+
+        with self.lock:
+            if reset_delay:
+                # Right after a window opens the reset delay is the whole window
+                self._observed_period = max(self._observed_period or 0.0, reset_delay)
+            if limit is not None and limit.isdigit() and int(limit) > 0:
+                period = self._observed_period or self.period
+                if (int(limit), period) != (self.max_requests, self.period):
+                    self._learn_limit(int(limit), period)
+            if remaining is not None and remaining.isdigit():
+                now = time.monotonic()
+                self._refill(now)
+                self.tokens = min(self.tokens, float(remaining))
+                if int(remaining) == 0 and reset_delay and response.status_code != 429:
+                    # The window is used up: wait for it rather than running into a 429
+                    self._pause(now, reset_delay)
+
+            if response.status_code != 429:
+                # Additive increase back towards the full rate
+                self.rate = min(self.max_rate, self.rate + self.max_rate / 50)
+                return None
+            # Multiplicative decrease, once per pause: the other requests that were already in
+            # flight when the limit was hit come back as 429 too, but are the same overshoot
+            if time.monotonic() >= self.updated:
+                self.rate = max(self.min_rate, self.rate / 2)
+
+        wait = parse_retry_after(response.headers.get("Retry-After"))
+        if wait is None:
+            wait = reset_delay
+        if wait is None:
+            wait = self.period
+        self.pause(wait)
+        return wait
@@ -0,0 +1,70 @@
+from collections import defaultdict
+
+HOURS_TOLERANCE = 0.005  # Harvest rounds hours to two decimals
+
+
+def entry_key(project_id, task_id):
+    return (int(project_id), int(task_id))
+
+
+def _same_hours(a, b):
+    return abs(float(a) - float(b)) < HOURS_TOLERANCE
+
+
+def _same_notes(a, b):
+    return (a or "") == (b or "")
+
+
+def plan_reconciliation(existing_entries, spent_dates, entries_for_date):
+    """
+    Work out the minimal writes that turn the existing time entries into the wanted entries for each date.
+    `entries_for_date` returns the wanted entries for a spent_date (YYYY-MM-DD).
+
+    Existing entries are indexed by spent_date and (project_id, task_id). Entries already matching a
+    wanted entry are left alone, entries for the same project/task with different hours or notes are
+    updated, missing ones are created and extra ones on the planned dates are deleted. Entries on
+    dates that are not being filled are never touched.
+
+    Returns a list of operations in date order, each a dict with an "action" of
+    "create", "update" or "delete" plus the "spent_date" (YYYY-MM-DD), the wanted "entry"
+    and/or the "existing" TimeEntry.
+    """
+    planned_dates = set(spent_dates)
+    # spent_date -> (project_id, task_id) -> existing entries
+    index = defaultdict(lambda: defaultdict(list))
+    for existing in existing_entries:
+        if existing.spent_date in planned_dates:
+            index[existing.spent_date][entry_key(existing.project.id, existing.task.id)].append(existing)
+
+    operations = []
+    for spent_date in sorted(planned_dates):
+        wanted = defaultdict(list)
+        for entry in entries_for_date(spent_date):
+            wanted[entry_key(entry["project_id"], entry["task_id"])].append(entry)
+
+        existing_for_day = index.pop(spent_date, {})
+        for key, entries in wanted.items():
+            candidates = existing_for_day.pop(key, [])
+            unmatched = []
+            for entry in entries:
+                # Prefer an existing entry that already matches exactly
+                match = next((c for c in candidates if _same_hours(c.hours, entry["hours"])
+                              and _same_notes(c.notes, entry.get("notes"))), None)
+                if match is not None:
+                    candidates.remove(match)
+                else:
+                    unmatched.append(entry)
+            for entry in unmatched:
+                if candidates:
+                    operations.append({"action": "update", "spent_date": spent_date, "entry": entry, "existing": candidates.pop(0)})
+                else:
+                    operations.append({"action": "create", "spent_date": spent_date, "entry": entry})
+            for existing in candidates:
+                operations.append({"action": "delete", "spent_date": spent_date, "existing": existing})
+
+        # Whatever is left for this date has no counterpart in the wanted entries
+        for leftovers in existing_for_day.values():
+            for existing in leftovers:
+                operations.append({"action": "delete", "spent_date": spent_date, "existing": existing})
+
+    return operations
@@ -0,0 +1,142 @@
+import csv
+import json
+from datetime import date
+
+REPORT_FORMATS = ("text", "csv", "jsonl")
+REPORT_FIELDS = ["spent_date", "user", "project", "task", "hours", "notes", "id"]
+
+# Hours are compared with the target with this tolerance to absorb float rounding
+HOURS_TOLERANCE = 0.01
+
+
+def flatten_entry(entry):
+    """Turn a TimeEntry into a flat report row"""
+    return {
+        "spent_date": entry.spent_date,
+        "user": entry.user_name or "",
+        "project": entry.project.name,
+        "task": entry.task.name,
+        "hours": entry.hours,
+        "notes": entry.notes or "",
+        "id": entry.id,
+    }
+
+
+class ReportWriter:
+    """Writes entries one at a time as text lines, CSV rows or JSON lines."""
+
+    def __init__(self, stream, output_format="text"):
+        if output_format not in REPORT_FORMATS:
+            raise ValueError(f"Unknown report format '{output_format}', expected one of {', '.join(REPORT_FORMATS)}")
+        self.stream = stream
+        self.output_format = output_format
+        self.count = 0
+        self._csv = None
+        if output_format == "csv":
+            self._csv = csv.DictWriter(stream, fieldnames=REPORT_FIELDS, lineterminator="\n")
+            self._csv.writeheader()
+
+    def write(self, entry):
+        self.count += 1
+        if self.output_format == "text":
+            if self.count == 1:
+                print("-" * 80, file=self.stream)
+            print(f"Date: {entry.spent_date}, Project: {entry.project.name}, Task: {entry.task.name}, Hours: {entry.hours}, Notes: {entry.notes}", file=self.stream)
+        elif self.output_format == "csv":
+            self._csv.writerow(flatten_entry(entry))
+        else:
+            self.stream.write(json.dumps(flatten_entry(entry)) + "\n")
+
+    def close(self):
+        if self.output_format == "text" and self.count:
+            print("-" * 80, file=self.stream)
+        self.stream.flush()
+
+
+class ReportAggregator:
+    """
+    Totals entries in a single pass. Only running sums are kept (per day, per project/task and per
+    ISO week), so memory grows with the number of days and projects in the range, never with the
+    number of entries.
+    """
+
+    def __init__(self, target_hours=None):
+        self.target_hours = target_hours
+        self.entry_count = 0
+        self.total_hours = 0.0
+        self.hours_by_day = {}
+        self.hours_by_project_task = {}
+        self.hours_by_week = {}
+
+    def add(self, entry):
+        hours = float(entry.hours or 0)
+        spent_date = entry.spent_date
+        project_task = (entry.project.name, entry.task.name)
+        self.entry_count += 1
+        self.total_hours += hours
+        self.hours_by_day[spent_date] = self.hours_by_day.get(spent_date, 0.0) + hours
+        self.hours_by_project_task[project_task] = self.hours_by_project_task.get(project_task, 0.0) + hours
+        year, week, _ = date.fromisoformat(spent_date).isocalendar()
+        week_key = f"{year}-W{week:02d}"
+        self.hours_by_week[week_key] = self.hours_by_week.get(week_key, 0.0) + hours
+
+    def underfilled_days(self, workdays):
+        """(YYYY-MM-DD, hours) for each workday logged below the target, including days with nothing logged"""
+        if self.target_hours is None:
+            return []
+        days = []
+        for workday in workdays:
+            spent_date = workday.strftime("%Y-%m-%d")
+            hours = self.hours_by_day.get(spent_date, 0.0)
+            if hours < self.target_hours - HOURS_TOLERANCE:
+                days.append((spent_date, hours))
+        return days
+
+    def overfilled_days(self):
+        """(YYYY-MM-DD, hours) for each day logged above the target"""
+        if self.target_hours is None:
+            return []
+        return sorted(
+            (spent_date, hours) for spent_date, hours in self.hours_by_day.items()
+            if hours > self.target_hours + HOURS_TOLERANCE
+        )
+
+    def to_dict(self, workdays=()):
+        return {
+            "entries": self.entry_count,
+            "total_hours": round(self.total_hours, 2),
+            "target_hours_per_day": self.target_hours,
+            "hours_by_day": {day: round(hours, 2) for day, hours in sorted(self.hours_by_day.items())},
+            "hours_by_week": {week: round(hours, 2) for week, hours in sorted(self.hours_by_week.items())},
+            "hours_by_project_task": [
+                {"project": project, "task": task, "hours": round(hours, 2)}
+                for (project, task), hours in sorted(self.hours_by_project_task.items())
+            ],
+            "underfilled_days": [{"spent_date": day, "hours": round(hours, 2)} for day, hours in self.underfilled_days(workdays)],
+            "overfilled_days": [{"spent_date": day, "hours": round(hours, 2)} for day, hours in self.overfilled_days()],
+        }
+
+    def print_summary(self, workdays=(), stream=None):
+        print(f"Found {self.entry_count} time entries, {self.total_hours:g} hours in total", file=stream)
+        if not self.entry_count:
+            return
+        print("\nHours per week:", file=stream)
+        for week, hours in sorted(self.hours_by_week.items()):
+            print(f"  {week}: {hours:g}", file=stream)
+        print("\nHours per project/task:", file=stream)
+        for (project, task), hours in sorted(self.hours_by_project_task.items()):
+            print(f"  {project} / {task}: {hours:g}", file=stream)
+        if self.target_hours is None:
+            return
+        underfilled = self.underfilled_days(workdays)
+        overfilled = self.overfilled_days()
+        if underfilled:
+            print(f"\nWorkdays below {self.target_hours:g} hours:", file=stream)
+            for spent_date, hours in underfilled:
+                print(f"  {spent_date}: {hours:g}", file=stream)
+        if overfilled:
+            print(f"\nDays above {self.target_hours:g} hours:", file=stream)
+            for spent_date, hours in overfilled:
+                print(f"  {spent_date}: {hours:g}", file=stream)
+        if not underfilled and not overfilled:
+            print(f"\nEvery workday has {self.target_hours:g} hours logged", file=stream)
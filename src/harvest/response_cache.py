@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 32 * 1024 * 1024
+
+# Response headers kept with a cached body
+KEPT_HEADERS = ("Content-Type", "ETag", "Last-Modified")
+
+
+class CachedResponse:
+    __slots__ = ("url", "resource", "content", "headers", "encoding", "stored_at")
+
+    def __init__(self, url, resource, response):
+        self.url = url
+        self.resource = resource
+        self.content = response.content
+        self.headers = {name: response.headers[name] for name in KEPT_HEADERS if name in response.headers}
+        self.encoding = response.encoding
+        self.stored_at = time.monotonic()
+
+    def validators(self):
+        """Conditional request headers, empty when the server sent neither ETag nor Last-Modified"""
+        headers = {}
+        if "ETag" in self.headers:
+            headers["If-None-Match"] = self.headers["ETag"]
+        if "Last-Modified" in self.headers:
+            headers["If-Modified-Since"] = self.headers["Last-Modified"]
+        return headers
+
+    def to_response(self):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = self.content
+        response.headers = CaseInsensitiveDict(self.headers)
+        response.encoding = self.encoding
+        response.url = self.url
+        return response
+
+
+class ResponseCache:
+    """
+    In-memory cache of successful GET responses, keyed by URL and query parameters.
+
+    Responses younger than `ttl` seconds are served without a request. Older ones are revalidated
+    with If-None-Match/If-Modified-Since when the server sent an ETag or Last-Modified (a 304
+    reuses the stored body), and dropped otherwise. The least recently used responses are evicted
+    beyond `max_entries` or `max_bytes`. A write invalidates every cached response under the same
+    top-level resource, e.g. any /time_entries page after a POST to /time_entries.
+    """
+
+    def __init__(self, base_url, ttl, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES):
+        self.base_path = urlparse(base_url or "").path.rstrip("/")
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        # Bumped on every write to a resource, so a read that overlapped the write is not stored
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(url, params=None):
+        """Canonical cache key: the URL with its query and `params` merged and sorted"""
+        parsed = urlparse(url)
+        query = parse_qsl(parsed.query, keep_blank_values=True)
+        if params:
+            query += [(name, str(value)) for name, value in params.items() if value is not None]
+        return f"{parsed.scheme}://{parsed.netloc}{parsed.path}?{urlencode(sorted(query))}"
+
+    def resource(self, url):
+        """Top-level resource of a URL, e.g. /time_entries for /time_entries/123.json"""
+        path = urlparse(url).path
+        if path.startswith(self.base_path):
+            path = path[len(self.base_path):]
+        first = path.strip("/").split("/", 1)[0]
+        return "/" + (first[:-len(".json")] if first.endswith(".json") else first)
+
+    def generation(self, url):
+        """Token to pass to store() for a response to this URL requested from now on"""
+        return self._generations.get(self.resource(url), 0)
+
+    def lookup(self, key):
+        """Return (cached response or None, fresh) for a key, dropping it if it can no longer be used"""
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is None:
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if time.monotonic() - cached.stored_at < self.ttl:
+                self.hits += 1
+                return cached, True
+            if cached.validators():
+                return cached, False
+            self._remove(key)
+            self.misses += 1
+            return None, False
+
+    def revalidate(self, cached):
+        """The server answered 304: the stored body is current again"""
+        with self._lock:
+            cached.stored_at = time.monotonic()
+            self.revalidated += 1
+
+    def store(self, key, url, response, generation):
+        if len(response.content) > self.max_bytes:
+            return
+        cached = CachedResponse(url, self.resource(url), response)
+        with self._lock:
+            if self._generations.get(cached.resource, 0) != generation:
+                return
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = cached
+            self.size += len(cached.content)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate(self, url):
+        """Drop every cached response under the resource a write went to"""
+        resource = self.resource(url)
+        with self._lock:
+            self._generations[resource] = self._generations.get(resource, 0) + 1
+            for key in [key for key, cached in self._entries.items() if cached.resource == resource]:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def _remove(self, key):
+        self.size -= len(self._entries.pop(key).content)
@@ -0,0 +1,212 @@
+import json
+import math
+import os
+import re
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from .harvest_controller import HarvestController
+from .harvest_sdk import DEFAULT_POOL_SIZE, create_session
+from utils.date_utils import DateUtils
+
+
+def load_manifest(path, default_holidays):
+    """
+    Read a team manifest (JSON) and return one settings dict per user.
+
+    Each user needs a "name" and an "access_token_env" (the environment variable holding their
+    token) or an "access_token". "account_id", "holidays" ({"country", "state"}) and "entries"
+    (same shape as timesheet_entries_for_a_day) fall back to the manifest's "defaults", then to
+    HARVEST_ACCOUNT_ID, HOLIDAY_CONFIG and timesheet_entries_for_a_day.
+    """
+    with open(path) as f:
+        manifest = json.load(f)
+    defaults = manifest.get("defaults", {})
+    users = []
+    seen = set()
+    for position, user in enumerate(manifest.get("users", []), 1):
+        name = user.get("name")
+        if not name:
+            raise ValueError(f"User #{position} in {path} has no name")
+        if name in seen:
+            raise ValueError(f"User '{name}' appears more than once in {path}")
+        seen.add(name)
+        access_token = user.get("access_token")
+        if not access_token and user.get("access_token_env"):
+            access_token = os.getenv(user["access_token_env"])
+        if not access_token:
+            raise ValueError(f"No access token for user '{name}': set access_token_env to a defined environment variable")
+        account_id = user.get("account_id", defaults.get("account_id", os.getenv("HARVEST_ACCOUNT_ID")))
+        if not account_id:
+            raise ValueError(f"No account_id for user '{name}' and HARVEST_ACCOUNT_ID is not set")
+        holidays = user.get("holidays", defaults.get("holidays", default_holidays))
+        users.append({
+            "name": name,
+            "account_id": str(account_id),
+            "access_token": access_token,
+            "country": holidays["country"],
+            "state": holidays.get("state"),
+            "entries": user.get("entries", defaults.get("entries")),
+        })
+    if not users:
+        raise ValueError(f"No users in {path}")
+    return users
+
+
+class TeamResult:
+    """Outcome of a team run for one user"""
+
+    def __init__(self, name):
+        self.name = name
+        self.workdays = 0
+        self.created = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors = []
+
+    def to_dict(self):
+        return {
+            "workdays": self.workdays,
+            "created": self.created,
+            "already_created": self.skipped,
+            "failed": self.failed,
+            "errors": self.errors,
+        }
+
+
+class TeamRunner:
+    """
+    Fills the timesheets of several users in one process.
+
+    Every user gets a HarvestController with their own credentials, entry template, journal and
+    rate limiter (Harvest limits requests per token), while the HTTP connection pool and the
+    holiday calendars of each region are shared. Entries are sent through one worker pool that
+    takes turns between users and caps each user's share of the workers, so a user who is being
+    rate limited cannot hold up everyone else.
+    """
+
+    def __init__(self, users, workers=DEFAULT_POOL_SIZE):
+        self.workers = max(1, workers)
+        self.session = create_session(pool_size=max(DEFAULT_POOL_SIZE, self.workers))
+        self._date_utils = {}
+        self.users = users
+        self.controllers = {
+            user["name"]: HarvestController(
+                use_store=False,
+                account_id=user["account_id"],
+                access_token=user["access_token"],
+                entry_template=user["entries"],
+                session=self.session
+            )
+            for user in users
+        }
+        self.results = {user["name"]: TeamResult(user["name"]) for user in users}
+
+    def date_utils_for(self, country, state):
+        """One DateUtils per holiday region, so its calendars are built once for the whole team"""
+        key = (country, state)
+        if key not in self._date_utils:
+            self._date_utils[key] = DateUtils(country=country, state=state)
+        return self._date_utils[key]
+
+    def close(self):
+        for controller in self.controllers.values():
+            controller.close_journal(False)
+        self.session.close()
+
+    def _plan_user(self, user, first_date, last_date, journal_name, resume):
+        """Open the user's journal and list the entries still to create as (spent_date, index, entry)"""
+        name = user["name"]
+        controller = self.controllers[name]
+        result = self.results[name]
+        workdays = list(self.date_utils_for(user["country"], user["state"]).iter_workdays(first_date, last_date))
+        result.workdays = len(workdays)
+        controller.open_journal(f"{journal_name}-{re.sub(r'[^A-Za-z0-9_.-]', '_', name)}", resume=resume)
+        jobs = []
+        for date in workdays:
+            spent_date = date.strftime("%Y-%m-%d")
+            for index, entry in enumerate(controller._planned_entries(spent_date)):
+                if controller._is_done(spent_date, index):
+                    result.skipped += 1
+                else:
+                    jobs.append((spent_date, index, entry))
+        return jobs
+
+    def _fair_share(self, active_users):
+        return max(1, math.ceil(self.workers / max(1, active_users)))
+
+    def run(self, first_date, last_date, journal_name, resume=False):
+        """Fill every user's workdays between two dates. Returns {name: TeamResult}."""
+        jobs_by_user = {}
+        # Planning resolves each user's projects, so it runs in parallel too
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = {
+                user["name"]: executor.submit(self._plan_user, user, first_date, last_date, journal_name, resume)
+                for user in self.users
+            }
+            for name, future in futures.items():
+                try:
+                    jobs_by_user[name] = deque(future.result())
+                except (requests.exceptions.RequestException, ValueError) as e:
+                    self.results[name].failed += 1
+                    self.results[name].errors.append(f"Could not plan entries: {e}")
+                    print(f"[{name}] Could not plan entries: {e}")
+
+        total = sum(len(jobs) for jobs in jobs_by_user.values())
+        print(f"Creating {total} time entries for {len(jobs_by_user)} users with {self.workers} workers...")
+        pending = {name: jobs for name, jobs in jobs_by_user.items() if jobs}
+        turns = deque(pending)
+        in_flight = {name: 0 for name in pending}
+        running = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while pending or running:
+                active = sum(1 for name in in_flight if name in pending or in_flight[name])
+                share = self._fair_share(active)
+                passed = 0
+                # Hand out free workers one user at a time, skipping users at their share
+                while len(running) < self.workers and turns and passed < len(turns):
+                    name = turns[0]
+                    turns.rotate(-1)
+                    if in_flight[name] >= share:
+                        passed += 1
+                        continue
+                    passed = 0
+                    spent_date, index, entry = pending[name].popleft()
+                    if not pending[name]:
+                        del pending[name]
+                        turns.remove(name)
+                    in_flight[name] += 1
+                    future = executor.submit(self.controllers[name]._create_entry, spent_date, entry, index)
+                    running[future] = (name, spent_date, entry)
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, spent_date, entry = running.pop(future)
+                    in_flight[name] -= 1
+                    self._record(name, spent_date, entry, future)
+
+        for name, controller in self.controllers.items():
+            controller.close_journal(self.results[name].failed == 0)
+        return self.results
+
+    def _record(self, name, spent_date, entry, future):
+        result = self.results[name]
+        description = f"{entry['hours']}h entry for {entry['project_name']} - {entry['task_name']}"
+        try:
+            future.result()
+            result.created += 1
+            print(f"[{name}] {spent_date}: Created {description}")
+        except requests.exceptions.RequestException as e:
+            result.failed += 1
+            result.errors.append(f"{spent_date}: {description}: {e}")
+            print(f"[{name}] {spent_date}: Error creating {description}: {e}")
+
+    def print_results(self):
+        print(f"\n{'user':<24}{'workdays':>10}{'created':>10}{'skipped':>10}{'failed':>10}")
+        for result in self.results.values():
+            print(f"{result.name:<24}{result.workdays:>10}{result.created:>10}{result.skipped:>10}{result.failed:>10}")
+
+    def results_dict(self):
+        return {name: result.to_dict() for name, result in self.results.items()}
@@ -0,0 +1,152 @@
+import os
+import sqlite3
+import sys
+from datetime import datetime
+from utils.cache_utils import get_cache_dir
+from .models import Project, Task, TimeEntry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS time_entries (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    spent_date TEXT NOT NULL,
+    project_id INTEGER,
+    project_name TEXT,
+    task_id INTEGER,
+    task_name TEXT,
+    hours REAL,
+    notes TEXT,
+    updated_at TEXT,
+    user_name TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_time_entries_user_date ON time_entries (user_id, spent_date);
+CREATE INDEX IF NOT EXISTS idx_time_entries_user_project ON time_entries (user_id, project_id, spent_date);
+CREATE TABLE IF NOT EXISTS sync_state (
+    user_id INTEGER PRIMARY KEY,
+    updated_since TEXT
+);
+"""
+
+UPSERT = """
+INSERT OR REPLACE INTO time_entries
+    (id, user_id, spent_date, project_id, project_name, task_id, task_name, hours, notes, updated_at, user_name)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+BATCH_SIZE = 500
+
+
+def _to_iso_date(date_str):
+    return datetime.strptime(date_str, "%d/%m/%Y").strftime("%Y-%m-%d")
+
+
+class TimeEntryStore:
+    """
+    Local SQLite mirror of the current user's Harvest time entries.
+
+    The first sync downloads the full history, later syncs only ask Harvest for entries changed
+    since the newest `updated_at` already stored. Harvest does not report deletions through
+    `updated_since`, so entries deleted outside this tool stay until their range is refreshed.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(get_cache_dir(), "time_entries.sqlite3")
+        self.connection = sqlite3.connect(self.path)
+        self.connection.row_factory = sqlite3.Row
+        self.connection.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        columns = {row["name"] for row in self.connection.execute("PRAGMA table_info(time_entries)")}
+        if "user_name" not in columns:
+            # Mirrors from before user names were stored: sync the full history again to fill them in
+            with self.connection:
+                self.connection.execute("ALTER TABLE time_entries ADD COLUMN user_name TEXT")
+                self.connection.execute("DELETE FROM sync_state")
+
+    def close(self):
+        self.connection.close()
+
+    def _row(self, user_id, entry):
+        return (
+            entry.id, user_id, entry.spent_date,
+            entry.project.id, entry.project.name,
+            entry.task.id, entry.task.name,
+            entry.hours, entry.notes, entry.updated_at, entry.user_name,
+        )
+
+    def _save(self, user_id, entries):
+        """Upsert entries in batches, returning the newest updated_at seen"""
+        newest = None
+        batch = []
+        for entry in entries:
+            batch.append(self._row(user_id, entry))
+            updated_at = entry.updated_at
+            if updated_at and (newest is None or updated_at > newest):
+                newest = updated_at
+            if len(batch) >= BATCH_SIZE:
+                self.connection.executemany(UPSERT, batch)
+                batch = []
+        if batch:
+            self.connection.executemany(UPSERT, batch)
+        return newest
+
+    def _get_watermark(self, user_id):
+        row = self.connection.execute("SELECT updated_since FROM sync_state WHERE user_id = ?", (user_id,)).fetchone()
+        return row["updated_since"] if row else None
+
+    def _set_watermark(self, user_id, watermark, previous):
+        if watermark and (previous is None or watermark > previous):
+            self.connection.execute("INSERT OR REPLACE INTO sync_state (user_id, updated_since) VALUES (?, ?)", (user_id, watermark))
+
+    def sync(self, sdk, refresh_from=None, refresh_to=None):
+        """
+        Bring the mirror up to date with Harvest. Returns the number of entries received.
+        With refresh_from/refresh_to (DD/MM/YYYY) that range is downloaded again and replaces
+        the local rows, which also drops entries deleted elsewhere.
+        """
+        user_id = sdk.get_user_id()
+        watermark = self._get_watermark(user_id)
+        received = 0
+
+        def counted(entries):
+            nonlocal received
+            for entry in entries:
+                received += 1
+                yield entry
+
+        with self.connection:
+            if watermark is None:
+                # First sync for this user: mirror the full history
+                newest = self._save(user_id, counted(sdk.iter_time_entries()))
+            else:
+                if refresh_from and refresh_to:
+                    self.connection.execute(
+                        "DELETE FROM time_entries WHERE user_id = ? AND spent_date BETWEEN ? AND ?",
+                        (user_id, _to_iso_date(refresh_from), _to_iso_date(refresh_to))
+                    )
+                    # A range refresh says nothing about changes elsewhere, so it never moves the watermark
+                    self._save(user_id, counted(sdk.iter_time_entries(refresh_from, refresh_to)))
+                newest = self._save(user_id, counted(sdk.iter_time_entries(updated_since=watermark)))
+            self._set_watermark(user_id, newest, watermark)
+        return received
+
+    def iter_entries(self, user_id, from_date, to_date):
+        """Yield stored entries between two dates (DD/MM/YYYY) as TimeEntry objects"""
+        cursor = self.connection.execute(
+            "SELECT * FROM time_entries WHERE user_id = ? AND spent_date BETWEEN ? AND ? ORDER BY spent_date, id",
+            (user_id, _to_iso_date(from_date), _to_iso_date(to_date))
+        )
+        for row in cursor:
+            yield TimeEntry(
+                row["id"], sys.intern(row["spent_date"]),
+                Project.get(row["project_id"], row["project_name"]),
+                Task.get(row["task_id"], row["task_name"]),
+                row["hours"], row["notes"], row["updated_at"],
+                sys.intern(row["user_name"]) if row["user_name"] else None,
+            )
+
+    def delete(self, entry_ids):
+        """Remove entries that were deleted through this tool"""
+        with self.connection:
+            self.connection.executemany("DELETE FROM time_entries WHERE id = ?", [(entry_id,) for entry_id in entry_ids])
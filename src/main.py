@@ -1,8 +1,7 @@
 import argparse
-from harvest.harvest_controller import HarvestController
+import atexit
+import sys
 from datetime import datetime, timedelta
-from utils.date_utils import DateUtils
-from config.harvest_config import HOLIDAY_CONFIG
 
 def parse_args():
     parser = argparse.ArgumentParser(description="Harvest Timesheet Automation")
@@ -11,6 +10,23 @@ def parse_args():
     parser.add_argument('--end', type=str, help="End date for range (DD/MM/YYYY)")
     parser.add_argument('--delete', action='store_true', help="Delete all time entries for the selected dates")
     parser.add_argument('--show', action='store_true', help="Show all time entries for the selected dates")
+    parser.add_argument('--format', choices=['text', 'csv', 'jsonl'], default='text', help="Output format for --show (default: text)")
+    parser.add_argument('--output', type=str, help="Write the --show report to this file instead of stdout")
+    parser.add_argument('--summary', type=str, help="Write the --show totals (per day, week and project/task, under/over-filled days) to this JSON file")
+    parser.add_argument('--target-hours', type=float, help="Hours a workday should add up to in the --show summary (default: the configured entries)")
+    parser.add_argument('--reconcile', action='store_true', help="Only create, update or delete what differs from the configured entries (safe to re-run)")
+    parser.add_argument('--refresh', action='store_true', help="Download the selected range again for --show or --delete instead of trusting the local store")
+    parser.add_argument('--from-calendar', action='store_true', help="Build entries from Google Calendar events using calendar_rules in the config")
+    parser.add_argument('--resume', action='store_true', help="Continue an interrupted fill for the same dates without creating duplicates")
+    parser.add_argument('--metrics', type=str, help="Write Harvest request metrics to this file at the end of the run ('-' for stdout)")
+    parser.add_argument('--metrics-format', choices=['json', 'prometheus'], default='json', help="Format for --metrics (default: json)")
+    parser.add_argument('--team', type=str, help="Fill the timesheets of every user in this team manifest (JSON) in one run")
+    parser.add_argument('--team-results', type=str, help="Write the per-user results of a --team run to this JSON file")
+    parser.add_argument('--daemon', action='store_true', help="Keep running: fill each workday at --fill-at and serve a local status/trigger endpoint")
+    parser.add_argument('--fill-at', type=str, default="17:00", help="Time of day (HH:MM) the daemon fills the day (default: 17:00)")
+    parser.add_argument('--port', type=int, default=8765, help="Port of the daemon's local endpoint (default: 8765)")
+    parser.add_argument('--trigger', action='store_true', help="Ask a running daemon to fill --date, --start/--end or today")
+    parser.add_argument('--workers', type=int, default=1, help="Number of Harvest API calls to run in parallel (default: 1)")
     return parser.parse_args()
 
 def validate_date_format(date_str, date_format="%d/%m/%Y"):
@@ -20,53 +36,208 @@ def validate_date_format(date_str, date_format="%d/%m/%Y"):
         print(f"Error: Invalid date format '{date_str}'. Expected format is DD/MM/YYYY")
         exit(1)
 
+def write_metrics(metrics, path, metrics_format, stream=None):
+    output = metrics.to_prometheus() if metrics_format == "prometheus" else metrics.to_json() + "\n"
+    if path == "-":
+        print(output, end="", file=stream or sys.stdout)
+    else:
+        with open(path, "w") as f:
+            f.write(output)
+
+def trigger_daemon(args):
+    """Send a fill request to a running daemon and print its result. Returns True if nothing failed."""
+    import json
+    from urllib.error import HTTPError, URLError
+    from urllib.parse import urlencode
+    from urllib.request import Request, urlopen
+    from utils.cache_utils import daemon_token_path
+
+    token_path = daemon_token_path(args.port)
+    try:
+        with open(token_path) as f:
+            token = f.read().strip()
+    except OSError:
+        print(f"Error: No daemon token at {token_path}, is the daemon running on port {args.port}?")
+        return False
+
+    params = {}
+    if args.date:
+        params["date"] = args.date
+    elif args.start and args.end:
+        params = {"start": args.start, "end": args.end}
+    url = f"http://127.0.0.1:{args.port}/fill" + (f"?{urlencode(params)}" if params else "")
+    # Header name matches TOKEN_HEADER in harvest/daemon.py, which --trigger doesn't import
+    request = Request(url, data=b"", headers={"X-Harvest-Daemon-Token": token}, method="POST")
+    try:
+        with urlopen(request) as response:
+            result = json.load(response)
+    except HTTPError as e:
+        result = json.load(e)
+    except URLError as e:
+        print(f"Error: No daemon listening on port {args.port}: {e.reason}")
+        return False
+    print(json.dumps(result, indent=2))
+    return not result.get("failed") and "error" not in result
+
+
+def run_team(args, default_holidays):
+    """Fill the timesheets of every user in the manifest. Returns the number of failed entries."""
+    import json
+    from harvest.harvest_sdk import DEFAULT_POOL_SIZE
+    from harvest.team import TeamRunner, load_manifest
+
+    try:
+        users = load_manifest(args.team, default_holidays)
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Error: Could not read team manifest {args.team}: {e}")
+        exit(1)
+
+    if args.date:
+        first_date = last_date = datetime.strptime(args.date, "%d/%m/%Y")
+    elif args.start and args.end:
+        first_date = datetime.strptime(args.start, "%d/%m/%Y")
+        last_date = datetime.strptime(args.end, "%d/%m/%Y")
+    else:
+        today = datetime.today()
+        first_date = datetime(today.year, today.month, today.day) - timedelta(days=today.weekday())
+        last_date = first_date + timedelta(days=4)
+
+    # A single worker would serialise the whole team, so team runs default to a full pool
+    runner = TeamRunner(users, workers=args.workers if args.workers > 1 else DEFAULT_POOL_SIZE)
+    if args.metrics:
+        from harvest.instrumentation import RequestMetrics
+        metrics = RequestMetrics()
+        for controller in runner.controllers.values():
+            controller.sdk.add_hook(metrics)
+        atexit.register(write_metrics, metrics, args.metrics, args.metrics_format)
+
+    print(f"Filling timesheets for {len(users)} users from {first_date:%d/%m/%Y} to {last_date:%d/%m/%Y}...")
+    try:
+        results = runner.run(first_date, last_date, f"team-{first_date:%Y%m%d}-{last_date:%Y%m%d}", resume=args.resume)
+    finally:
+        runner.close()
+    runner.print_results()
+    if args.team_results:
+        with open(args.team_results, "w") as f:
+            json.dump(runner.results_dict(), f, indent=2)
+    failed = sum(result.failed for result in results.values())
+    if failed:
+        print("Some entries failed, use --resume with the same dates to retry them")
+    return failed
+
 
 if __name__ == "__main__":
     args = parse_args()
+    if args.workers < 1:
+        print("Error: --workers must be at least 1")
+        exit(1)
+    for date_arg in (args.date, args.start, args.end):
+        if date_arg:
+            validate_date_format(date_arg)
+    if args.daemon:
+        try:
+            datetime.strptime(args.fill_at, "%H:%M")
+        except ValueError:
+            print(f"Error: Invalid time '{args.fill_at}'. Expected format is HH:MM")
+            exit(1)
+    if args.trigger:
+        exit(0 if trigger_daemon(args) else 1)
+    if args.team and (args.show or args.delete or args.reconcile or args.from_calendar):
+        print("Error: --team only fills timesheets and cannot be combined with --show, --delete, --reconcile or --from-calendar")
+        exit(1)
+
+    # Heavy dependencies (requests, dotenv, holidays, the config module) are only imported
+    # once the arguments are known to be valid, keeping --help and usage errors instant
+    from harvest.harvest_controller import HarvestController
+    from harvest.report import ReportAggregator, ReportWriter
+    from utils.date_utils import DateUtils
+    from config.harvest_config import HOLIDAY_CONFIG
+
+    if args.team:
+        exit(1 if run_team(args, HOLIDAY_CONFIG) else 0)
+    if args.daemon:
+        from harvest.daemon import FillDaemon
+        try:
+            FillDaemon(fill_time=args.fill_at, port=args.port, workers=args.workers).serve_forever()
+        except KeyboardInterrupt:
+            print("Daemon stopped")
+        exit(0)
+
+    # Keep progress messages (and --metrics=-) out of machine-readable --show output written to stdout
+    machine_output = args.show and args.format != "text" and not args.output
+    status_stream = sys.stderr if machine_output else sys.stdout
 
-    harvest_controller = HarvestController()
+    harvest_controller = HarvestController(workers=args.workers)
+    if args.metrics:
+        from harvest.instrumentation import RequestMetrics
+        metrics = RequestMetrics()
+        harvest_controller.sdk.add_hook(metrics)
+        atexit.register(write_metrics, metrics, args.metrics, args.metrics_format, status_stream)
     date_utils = DateUtils(country=HOLIDAY_CONFIG["country"], state=HOLIDAY_CONFIG["state"])
 
     if args.date:
-        validate_date_format(args.date)
-        print(f"Processing single date: {args.date}")
+        print(f"Processing single date: {args.date}", file=status_stream)
         dates = [datetime.strptime(args.date, "%d/%m/%Y")]
     elif args.start and args.end:
-        validate_date_format(args.start)
-        validate_date_format(args.end)
         # For date ranges, we'll process dates one by one with real-time feedback
         dates = None  # We'll use the generator instead
     else:
-        print("No specific dates provided, processing current work week...")
-        dates = date_utils.get_current_week_dates()
-        print(f"Found {len(dates)} workdays in current week\n")
+        print("No specific dates provided, processing current work week...", file=status_stream)
+        dates = date_utils.get_current_week_dates(verbose=not machine_output)
+        print(f"Found {len(dates)} workdays in current week\n", file=status_stream)
+
+    if not (args.show or args.delete):
+        # Resolve project and task names before anything is written, so a typo stops the run cleanly
+        try:
+            if args.from_calendar:
+                workdays = date_utils.get_date_range(args.start, args.end) if dates is None else dates
+                harvest_controller.load_calendar_entries(workdays)
+            else:
+                harvest_controller.default_entries()
+        except ValueError as e:
+            print(f"Error: {e}")
+            exit(1)
 
     if args.show:
         if args.start and args.end:
-            print("Collecting time entries for date range...")
-            # For ranges, get all workdays first then fetch entries
-            workdays, _ = date_utils.process_date_range(args.start, args.end, verbose=False)
+            print("Collecting time entries for date range...", file=status_stream)
             from_date = args.start
             to_date = args.end
         else:
             from_date = args.start if args.start else dates[0].strftime("%d/%m/%Y")
             to_date = args.end if args.end else dates[-1].strftime("%d/%m/%Y")
 
-        print(f"Fetching time entries from {from_date} to {to_date}...")
-        entries = harvest_controller.sdk.get_time_entries(from_date, to_date)
+        import json
+        from contextlib import redirect_stdout
+
+        report_stream = open(args.output, "w", newline="") if args.output else sys.stdout
+        writer = ReportWriter(report_stream, args.format)
+        aggregator = ReportAggregator(args.target_hours if args.target_hours is not None else harvest_controller.target_hours_per_day())
+        try:
+            with redirect_stdout(status_stream):
+                print(f"Fetching time entries from {from_date} to {to_date}...")
+                for entry in harvest_controller.iter_entries(from_date, to_date, refresh=args.refresh):
+                    writer.write(entry)
+                    aggregator.add(entry)
+        finally:
+            writer.close()
+            if args.output:
+                report_stream.close()
 
-        if entries:
-            print(f"\nFound {len(entries)} time entries:")
-            print("-" * 80)
-            for entry in entries:
-                print(f"Date: {entry['spent_date']}, Project: {entry['project']['name']}, Task: {entry['task']['name']}, Hours: {entry['hours']}, Notes: {entry['notes']}")
+        start_day = datetime.strptime(from_date, "%d/%m/%Y")
+        end_day = datetime.strptime(to_date, "%d/%m/%Y")
+        workdays = date_utils.iter_workdays(start_day, end_day)
+        if args.summary:
+            with open(args.summary, "w") as f:
+                json.dump(aggregator.to_dict(workdays), f, indent=2)
+            print(f"Summary written to {args.summary}", file=status_stream)
+        elif aggregator.entry_count:
+            aggregator.print_summary(workdays, stream=status_stream)
         else:
-            print("No time entries found for the specified date range.")
+            print("No time entries found for the specified date range.", file=status_stream)
     elif args.delete:
         if args.start and args.end:
             print("Preparing to delete time entries for date range...")
-            # For ranges, get all workdays first then delete entries
-            workdays, _ = date_utils.process_date_range(args.start, args.end, verbose=False)
             from_date = args.start
             to_date = args.end
         else:
@@ -74,25 +245,66 @@ if __name__ == "__main__":
             to_date = args.end if args.end else dates[-1].strftime("%d/%m/%Y")
 
         print(f"Deleting time entries from {from_date} to {to_date}...")
-        harvest_controller.delete_time_entries_for_date(from_date, to_date)
+        failed = harvest_controller.delete_time_entries_for_date(from_date, to_date, refresh=args.refresh)
         print("Delete operation completed.")
+        if failed:
+            exit(1)
+    elif args.reconcile:
+        if args.start and args.end:
+            dates, _ = date_utils.process_date_range(args.start, args.end)
+        print(f"Reconciling timesheet for {len(dates)} workdays...")
+        print("=" * 80)
+        failed = harvest_controller.reconcile_timesheets(dates)
+        print("=" * 80)
+        if failed:
+            exit(1)
     else:
+        # Fill runs are journaled so an interrupted run can continue with --resume
         if args.start and args.end:
-            # Use generator for real-time feedback on date ranges
-            print("Starting timesheet filling with real-time progress...")
-            for date in date_utils.process_date_range_with_feedback(args.start, args.end):
-                date_str = date.strftime("%d/%m/%Y")
-                harvest_controller.fill_timesheet(date_str)
+            first_date = datetime.strptime(args.start, "%d/%m/%Y")
+            last_date = datetime.strptime(args.end, "%d/%m/%Y")
         else:
-            # Process pre-calculated dates for single date or current week
-            print(f"Starting timesheet filling for {len(dates)} workdays...")
-            print("=" * 80)
-            for i, date in enumerate(dates, 1):
-                date_str = date.strftime("%d/%m/%Y")
-                print(f"\n[{i}/{len(dates)}] Processing {date_str} ({date.strftime('%A')})...")
-                print("-" * 60)
-                harvest_controller.fill_timesheet(date_str)
-                print("-" * 60)
-            print(f"\n{'=' * 80}")
-            print("Timesheet filling completed for all workdays!")
-            print("=" * 80)
\ No newline at end of file
+            first_date, last_date = (dates[0], dates[-1]) if dates else (datetime.today(), datetime.today())
+        try:
+            harvest_controller.open_journal(f"{first_date:%Y%m%d}-{last_date:%Y%m%d}", resume=args.resume)
+        except ValueError as e:
+            print(f"Error: {e}")
+            exit(1)
+        failed = 0
+        completed = False
+        try:
+            if args.workers > 1:
+                if args.start and args.end:
+                    dates, _ = date_utils.process_date_range(args.start, args.end)
+                print(f"Starting timesheet filling for {len(dates)} workdays with {args.workers} workers...")
+                print("=" * 80)
+                failed = harvest_controller.fill_timesheets(dates)
+                print(f"\n{'=' * 80}")
+                print("Timesheet filling completed for all workdays!")
+                print("=" * 80)
+            elif args.start and args.end:
+                # Use generator for real-time feedback on date ranges
+                print("Starting timesheet filling with real-time progress...")
+                for date in date_utils.process_date_range_with_feedback(args.start, args.end):
+                    date_str = date.strftime("%d/%m/%Y")
+                    failed += harvest_controller.fill_timesheet(date_str)
+            else:
+                # Process pre-calculated dates for single date or current week
+                print(f"Starting timesheet filling for {len(dates)} workdays...")
+                print("=" * 80)
+                for i, date in enumerate(dates, 1):
+                    date_str = date.strftime("%d/%m/%Y")
+                    print(f"\n[{i}/{len(dates)}] Processing {date_str} ({date.strftime('%A')})...")
+                    print("-" * 60)
+                    failed += harvest_controller.fill_timesheet(date_str)
+                    print("-" * 60)
+                print(f"\n{'=' * 80}")
+                print("Timesheet filling completed for all workdays!")
+                print("=" * 80)
+            completed = failed == 0
+        finally:
+            harvest_controller.close_journal(completed)
+            if not completed:
+                print("Run did not complete, use --resume with the same dates to continue where it stopped")
+        if failed:
+            exit(1)
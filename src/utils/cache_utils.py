@@ -0,0 +1,43 @@
+"""
+Helpers for the small on-disk caches kept between CLI runs.
+"""
+import json
+import os
+import tempfile
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "harvest-timesheet-automation")
+
+
+def get_cache_dir() -> str:
+    """Return the cache directory (HARVEST_CACHE_DIR or ~/.cache/harvest-timesheet-automation), creating it if needed."""
+    cache_dir = os.getenv("HARVEST_CACHE_DIR") or DEFAULT_CACHE_DIR
+    os.makedirs(cache_dir, exist_ok=True)
+    return cache_dir
+
+
+def read_json(path: str, default=None):
+    """Read a JSON cache file, returning `default` when it is missing or unreadable."""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json_atomic(path: str, data) -> None:
+    """Write a JSON cache file atomically so a crash never leaves a half-written file behind."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def daemon_token_path(port: int) -> str:
+    """Path of the secret a daemon listening on `port` requires from --trigger."""
+    return os.path.join(get_cache_dir(), f"daemon-{port}.token")
@@ -1,36 +1,68 @@
 """
 Date utilities for handling workdays, weekends, and public holidays.
 """
-from datetime import datetime, timedelta
-from typing import List
-import holidays
+from array import array
+from datetime import date as date_type, datetime, timedelta
+from typing import Iterator, List, Optional, Tuple
+from utils.holiday_cache import HolidayCache, default_holiday_cache
+
+WORKDAY = 1
+NON_WORKDAY = 0
 
 
 class DateUtils:
     """Utility class for date operations with holiday and weekend awareness."""
 
-    def __init__(self, country: str = "AU", state: str = "VIC"):
+    def __init__(self, country: str = "AU", state: str = "VIC", holiday_cache: Optional[HolidayCache] = None):
         """
         Initialize DateUtils with holiday configuration.
 
         Args:
             country: Country code for holidays (default: "AU" for Australia)
             state: State/province code for regional holidays (default: "VIC" for Victoria/Melbourne)
+            holiday_cache: Cache of resolved holiday calendars (default: the shared on-disk cache)
         """
         self.country = country
         self.state = state
+        self.holiday_cache = holiday_cache or default_holiday_cache
         self._holidays_cache = {}
+        self._year_calendars = {}
 
     def get_holidays_for_year(self, year: int):
-        """Get holidays for a specific year, with caching."""
+        """Get holidays for a specific year as a {date: name} dict, with in-memory and on-disk caching."""
         if year not in self._holidays_cache:
-            self._holidays_cache[year] = holidays.country_holidays(
-                self.country,
-                state=self.state,
-                years=year
-            )
+            self._holidays_cache[year] = self.holiday_cache.get(self.country, self.state, year)
         return self._holidays_cache[year]
 
+    def _get_year_calendar(self, year: int) -> Tuple[int, bytearray, array]:
+        """
+        Get the precomputed workday calendar for a year, building it on first use.
+
+        Returns:
+            Tuple of (ordinal of 1 January, workday bitmap with one byte per day,
+            prefix sums where entry i is the number of workdays before day i)
+        """
+        calendar = self._year_calendars.get(year)
+        if calendar is None:
+            start = date_type(year, 1, 1)
+            start_ordinal = start.toordinal()
+            days_in_year = date_type(year + 1, 1, 1).toordinal() - start_ordinal
+            year_holidays = self.get_holidays_for_year(year)
+
+            mask = bytearray(days_in_year)
+            prefix = array("H", [0]) * (days_in_year + 1)
+            weekday = start.weekday()
+            count = 0
+            for offset in range(days_in_year):
+                if (weekday + offset) % 7 < 5 and date_type.fromordinal(start_ordinal + offset) not in year_holidays:
+                    mask[offset] = WORKDAY
+                    count += 1
+                prefix[offset + 1] = count
+
+            calendar = (start_ordinal, mask, prefix)
+            self._year_calendars[year] = calendar
+        return calendar
+
     def is_holiday(self, date: datetime) -> bool:
         """Check if a date is a public holiday."""
         year_holidays = self.get_holidays_for_year(date.year)
@@ -46,15 +78,53 @@ class DateUtils:
         Returns:
             True if the date is a workday, False otherwise
         """
-        # Check if it's a weekend (Saturday=5, Sunday=6)
-        if date.weekday() >= 5:
-            return False
+        start_ordinal, mask, _ = self._get_year_calendar(date.year)
+        return mask[date.toordinal() - start_ordinal] == WORKDAY
 
-        # Check if it's a public holiday
-        if self.is_holiday(date):
-            return False
-
-        return True
+    def count_workdays(self, start: datetime, end: datetime) -> int:
+        """
+        Count the workdays between start and end (inclusive) using the per-year prefix sums,
+        so the cost grows with the number of years rather than days.
+        """
+        count = 0
+        for year in range(start.year, end.year + 1):
+            start_ordinal, _, prefix = self._get_year_calendar(year)
+            first = start.toordinal() - start_ordinal if year == start.year else 0
+            last = end.toordinal() - start_ordinal if year == end.year else len(prefix) - 2
+            if last >= first:
+                count += prefix[last + 1] - prefix[first]
+        return count
+
+    def iter_workdays(self, start: datetime, end: datetime) -> Iterator[datetime]:
+        """Lazily yield the workdays between start and end (inclusive), skipping non-workdays in bulk."""
+        start = datetime(start.year, start.month, start.day)
+        base_ordinal = start.toordinal()
+        for year in range(start.year, end.year + 1):
+            start_ordinal, mask, _ = self._get_year_calendar(year)
+            offset = start.toordinal() - start_ordinal if year == start.year else 0
+            stop = end.toordinal() - start_ordinal + 1 if year == end.year else len(mask)
+            while True:
+                offset = mask.find(WORKDAY, offset, stop)
+                if offset < 0:
+                    break
+                yield start + timedelta(days=start_ordinal + offset - base_ordinal)
+                offset += 1
+
+    def iter_days(self, start: datetime, end: datetime) -> Iterator[Tuple[datetime, bool]]:
+        """Lazily yield (date, is_workday) for every day between start and end (inclusive)."""
+        for i in range((end - start).days + 1):
+            date = start + timedelta(days=i)
+            yield date, self.is_workday(date)
+
+    def get_skip_reasons(self, date: datetime) -> List[str]:
+        """Get the reasons a date is not a workday (weekend and/or holiday name)."""
+        reasons = []
+        if date.weekday() >= 5:
+            reasons.append("weekend")
+        holiday_name = self.get_holiday_name(date)
+        if holiday_name:
+            reasons.append(f"holiday ({holiday_name})")
+        return reasons
 
     def get_current_week_dates(self, verbose: bool = True) -> List[datetime]:
         """Get workdays for the current week (Monday to Friday, excluding holidays)."""
@@ -96,8 +166,7 @@ class DateUtils:
         """
         start = datetime.strptime(start_str, date_format)
         end = datetime.strptime(end_str, date_format)
-        all_dates = [start + timedelta(days=i) for i in range((end - start).days + 1)]
-        return [date for date in all_dates if self.is_workday(date)]
+        return list(self.iter_workdays(start, end))
 
     def get_holiday_name(self, date: datetime) -> str:
         """Get the name of the holiday for a given date, if it is a holiday."""
@@ -125,26 +194,18 @@ class DateUtils:
 
         # Calculate total days in range
         total_days = (end - start).days + 1
-        all_dates = [start + timedelta(days=i) for i in range(total_days)]
 
         # Separate workdays and non-workdays
         workdays = []
         skipped_dates = []
 
-        for date in all_dates:
-            if self.is_workday(date):
+        for date, is_workday in self.iter_days(start, end):
+            if is_workday:
                 workdays.append(date)
             else:
-                reason = []
-                if date.weekday() >= 5:
-                    reason.append("weekend")
-                if self.is_holiday(date):
-                    holiday_name = self.get_holiday_name(date)
-                    reason.append(f"holiday ({holiday_name})")
-
                 skipped_dates.append({
                     'date': date,
-                    'reasons': reason
+                    'reasons': self.get_skip_reasons(date)
                 })
 
         if verbose:
@@ -180,15 +241,14 @@ class DateUtils:
 
         # Calculate total days in range
         total_days = (end - start).days + 1
-        all_dates = [start + timedelta(days=i) for i in range(total_days)]
 
         workday_count = 0
         processed_count = 0
 
-        for date in all_dates:
+        for date, is_workday in self.iter_days(start, end):
             processed_count += 1
 
-            if self.is_workday(date):
+            if is_workday:
                 workday_count += 1
                 print(f"\n[{workday_count}] Processing workday: {date.strftime('%d/%m/%Y')} ({date.strftime('%A')})")
                 print("-" * 60)
@@ -196,14 +256,7 @@ class DateUtils:
                 print("-" * 60)
             else:
                 # Provide real-time feedback about skipped days
-                reasons = []
-                if date.weekday() >= 5:
-                    reasons.append("weekend")
-                if self.is_holiday(date):
-                    holiday_name = self.get_holiday_name(date)
-                    reasons.append(f"holiday ({holiday_name})")
-
-                reason_text = ', '.join(reasons)
+                reason_text = ', '.join(self.get_skip_reasons(date))
                 print(f"\n⏭️  Skipping {date.strftime('%d/%m/%Y')} ({date.strftime('%A')}) - {reason_text}")
 
         print(f"\n{'=' * 80}")
@@ -0,0 +1,156 @@
+"""
+Persistent cache of resolved public holiday calendars.
+
+Building `holidays.country_holidays(...)` is a noticeable part of every short CLI run, so the
+resolved {date: name} tables are stored on disk, one small JSON file per region and `holidays`
+package version. Each year is stored as [day_of_year, name] pairs.
+
+Pre-warm a list of regions (run from the src folder):
+
+    python -m utils.holiday_cache warm AU:VIC NZ US:CA --years 2024 2026
+"""
+import argparse
+import glob
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from importlib import metadata
+from typing import Dict, List, Optional
+
+from utils.cache_utils import get_cache_dir, read_json, write_json_atomic
+
+DEFAULT_MAX_AGE_DAYS = 30
+
+
+def get_holidays_version() -> str:
+    """Get the installed `holidays` version without importing the package."""
+    try:
+        return metadata.version("holidays")
+    except metadata.PackageNotFoundError:
+        return "unknown"
+
+
+def build_holidays(country: str, state: Optional[str], year: int) -> Dict[date, str]:
+    """Resolve the holidays for one region and year with the `holidays` package."""
+    import holidays  # Only needed on a cache miss
+
+    return dict(holidays.country_holidays(country, state=state, years=year))
+
+
+class HolidayCache:
+    """On-disk cache of holiday calendars keyed by country, state, year and `holidays` version."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_age_days: int = DEFAULT_MAX_AGE_DAYS, persistent: bool = True):
+        """
+        Args:
+            cache_dir: Directory for the cache files (default: <cache dir>/holidays)
+            max_age_days: Years built longer ago than this are rebuilt on access and evicted on save
+            persistent: Keep the calendars in memory only when False
+        """
+        self._cache_dir = cache_dir
+        self.max_age = max_age_days * 24 * 3600
+        self.persistent = persistent
+        self.version = get_holidays_version()
+        self._regions = {}
+        self._lock = threading.Lock()
+
+    @property
+    def cache_dir(self) -> str:
+        if self._cache_dir is None:
+            self._cache_dir = os.path.join(get_cache_dir(), "holidays")
+        return self._cache_dir
+
+    def _path(self, country: str, state: Optional[str]) -> str:
+        return os.path.join(self.cache_dir, f"{country}-{state or '_'}-{self.version}.json")
+
+    def _load_region(self, country: str, state: Optional[str]) -> dict:
+        key = (country, state)
+        if key not in self._regions:
+            self._regions[key] = read_json(self._path(country, state), {}) if self.persistent else {}
+        return self._regions[key]
+
+    def _is_stale(self, year_data: dict, now: float) -> bool:
+        return now - year_data["built_at"] > self.max_age
+
+    def get(self, country: str, state: Optional[str], year: int) -> Dict[date, str]:
+        """Get the {date: holiday name} table for a region and year, building and saving it on a miss."""
+        with self._lock:
+            region = self._load_region(country, state)
+            now = time.time()
+            year_data = region.get(str(year))
+            if year_data is None or self._is_stale(year_data, now):
+                resolved = build_holidays(country, state, year)
+                year_data = {
+                    "built_at": now,
+                    "days": sorted([day.timetuple().tm_yday, name] for day, name in resolved.items() if day.year == year),
+                }
+                region[str(year)] = year_data
+                self._save(country, state, region)
+
+        jan_first = date(year, 1, 1)
+        return {jan_first + timedelta(days=day_of_year - 1): name for day_of_year, name in year_data["days"]}
+
+    def _save(self, country: str, state: Optional[str], region: dict) -> None:
+        if not self.persistent:
+            return
+        now = time.time()
+        # Evict stale years while the file is being rewritten anyway
+        for year in [year for year, year_data in region.items() if self._is_stale(year_data, now)]:
+            del region[year]
+        write_json_atomic(self._path(country, state), region)
+
+    def warm(self, regions: List[str], years: List[int]) -> None:
+        """Build and store the calendars for "COUNTRY[:STATE]" regions and the given years."""
+        for region in regions:
+            country, _, state = region.partition(":")
+            for year in years:
+                self.get(country, state or None, year)
+
+    def prune(self) -> int:
+        """Delete cache files written for other `holidays` versions. Returns the number of files removed."""
+        removed = 0
+        for path in glob.glob(os.path.join(self.cache_dir, "*.json")):
+            if not path.endswith(f"-{self.version}.json"):
+                os.remove(path)
+                removed += 1
+        return removed
+
+    def clear(self) -> None:
+        """Delete every cached calendar."""
+        with self._lock:
+            self._regions.clear()
+            for path in glob.glob(os.path.join(self.cache_dir, "*.json")):
+                os.remove(path)
+
+
+# Shared by every DateUtils instance so multi-region runs load each file once
+default_holiday_cache = HolidayCache(persistent=os.getenv("HARVEST_HOLIDAY_CACHE", "1") != "0")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Manage the on-disk holiday calendar cache")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    warm_parser = subparsers.add_parser("warm", help="Pre-build calendars for regions such as AU:VIC or NZ")
+    warm_parser.add_argument("regions", nargs="+", help="Regions as COUNTRY[:STATE]")
+    warm_parser.add_argument("--years", type=int, nargs=2, metavar=("FIRST", "LAST"),
+                             help="Inclusive year range (default: last, current and next year)")
+    subparsers.add_parser("prune", help="Remove calendars built with other holidays versions")
+    subparsers.add_parser("clear", help="Remove all cached calendars")
+    args = parser.parse_args()
+
+    cache = default_holiday_cache
+    if args.command == "warm":
+        current_year = datetime.today().year
+        first, last = args.years if args.years else (current_year - 1, current_year + 1)
+        cache.warm(args.regions, list(range(first, last + 1)))
+        print(f"Cached holidays for {', '.join(args.regions)} ({first}-{last}) in {cache.cache_dir}")
+    elif args.command == "prune":
+        print(f"Removed {cache.prune()} outdated holiday cache files")
+    else:
+        cache.clear()
+        print(f"Cleared holiday cache in {cache.cache_dir}")
+
+
+if __name__ == "__main__":
+    main()